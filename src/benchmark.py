@@ -0,0 +1,211 @@
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+import blockparser
+import main as site
+from blockparser import block_to_block_type, markdown_to_blocks, markdown_to_html_node, parse_markdown, parse_markdown_lazy
+from copystatic import copy_files_recursive
+from corpus import generate_corpus
+from gencontent import find_pages
+from template import load_template
+from textparser import extract_markdown_images, extract_markdown_links, text_to_textnodes, texts_to_textnodes
+
+# Inputs that used to make the lazy link and image patterns rescan the rest
+# of the line from every bracket
+PATHOLOGICAL_INLINE = {
+    "unclosed_brackets": "word [" * 2000,
+    "nested_brackets": "[" * 4000,
+    "unclosed_images": "![alt " * 2000,
+    "unclosed_urls": "[text](url " * 1000,
+}
+PATHOLOGICAL_BLOCKS = {
+    "long_quote": "\n".join("> quoted line" for _ in range(5000)),
+    "long_list": "\n".join("- list item" for _ in range(5000)),
+}
+
+
+def time_stage(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def stage_result(timings, items):
+    best = min(timings)
+    return {
+        "seconds": best,
+        "mean_seconds": sum(timings) / len(timings),
+        "items": items,
+        "per_item_us": best / items * 1e6 if items else 0.0,
+    }
+
+@contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+def record_inline_texts(sources):
+    # Capture the exact strings the block renderers hand to the inline parser
+    texts = []
+    original = blockparser.text_to_textnodes
+    original_batch = blockparser.texts_to_textnodes
+
+    def recorder(text):
+        texts.append(text)
+        return original(text)
+
+    def batch_recorder(batch):
+        texts.extend(batch)
+        return original_batch(batch)
+
+    blockparser.text_to_textnodes = recorder
+    blockparser.texts_to_textnodes = batch_recorder
+    try:
+        for source in sources:
+            markdown_to_html_node(source)
+    finally:
+        blockparser.text_to_textnodes = original
+        blockparser.texts_to_textnodes = original_batch
+    return texts
+
+def run_benchmarks(root, repeat=3, jobs=1, stages=None):
+    content_dir = os.path.join(root, "content")
+    static_dir = os.path.join(root, "static")
+    template_path = os.path.join(root, "template.html")
+    pages = find_pages(content_dir, os.path.join(root, "out"))
+    sources = []
+    for src_path, _ in pages:
+        with open(src_path, "r") as f:
+            sources.append(f.read())
+    blocks = [block for source in sources for block in markdown_to_blocks(source)]
+    inline_texts = record_inline_texts(sources)
+    documents = [parse_markdown(source) for source in sources]
+    rendered = [(document.title, document.node.to_html()) for document in documents]
+    template = load_template(template_path, "/site/")
+
+    def static_copy():
+        dst_dir = os.path.join(root, "static-out")
+        shutil.rmtree(dst_dir, ignore_errors=True)
+        with redirect_stdout(io.StringIO()):
+            copy_files_recursive(static_dir, dst_dir)
+
+    def end_to_end():
+        # A cold run of main.py's own build, with the manifest, render
+        # cache and static sync; the corpus has the same layout as the site
+        shutil.rmtree(os.path.join(root, site.public_dir), ignore_errors=True)
+        shutil.rmtree(os.path.join(root, site.build_dir), ignore_errors=True)
+        args = site.build_parser().parse_args(["/site/", "--jobs", str(jobs)])
+        with working_directory(root), redirect_stdout(io.StringIO()):
+            site.build(args)
+
+    benchmarks = [
+        ("markdown_to_blocks", lambda: [markdown_to_blocks(source) for source in sources], len(sources)),
+        ("block_to_block_type", lambda: [block_to_block_type(block) for block in blocks], len(blocks)),
+        ("text_to_textnodes", lambda: [text_to_textnodes(text) for text in inline_texts], len(inline_texts)),
+        ("texts_to_textnodes", lambda: texts_to_textnodes(inline_texts), len(inline_texts)),
+        ("markdown_to_html_node", lambda: [markdown_to_html_node(source) for source in sources], len(sources)),
+        ("to_html", lambda: [document.node.to_html() for document in documents], len(documents)),
+        # Parse and render together, straight from blocks to html
+        ("lazy_render", lambda: [parse_markdown_lazy(source).to_html() for source in sources], len(sources)),
+        ("template_fill", lambda: [template.render(title, html) for title, html in rendered], len(rendered)),
+        ("static_copy", static_copy, len(os.listdir(os.path.join(static_dir, "images"))) + 1),
+        ("end_to_end", end_to_end, len(pages)),
+    ]
+    results = {}
+    for name, func, items in benchmarks:
+        if stages and name not in stages:
+            continue
+        results[name] = stage_result(time_stage(func, repeat), items)
+    return results
+
+def run_pathological_benchmarks(repeat=3):
+    benchmarks = []
+    for name, text in PATHOLOGICAL_INLINE.items():
+        for func in (text_to_textnodes, extract_markdown_links, extract_markdown_images):
+            benchmarks.append((f"{func.__name__}[{name}]", func, text))
+    for name, block in PATHOLOGICAL_BLOCKS.items():
+        benchmarks.append((f"block_to_block_type[{name}]", block_to_block_type, block))
+    results = {}
+    for name, func, text in benchmarks:
+        results[name] = stage_result(time_stage(lambda: func(text), repeat), 1)
+    return results
+
+def git_commit():
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+def print_results(results, baseline=None):
+    width = max([24] + [len(name) + 2 for name in results])
+    print(f"{'stage':<{width}}{'best (s)':>12}{'per item (us)':>16}{'items':>10}{'vs baseline':>14}")
+    for name, result in results.items():
+        change = ""
+        if baseline is not None and name in baseline and baseline[name]["seconds"] > 0:
+            change = f"{result['seconds'] / baseline[name]['seconds']:.2f}x"
+        print(f"{name:<{width}}{result['seconds']:>12.4f}{result['per_item_us']:>16.2f}{result['items']:>10}{change:>14}")
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmark")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--blocks", type=int, default=20, help="blocks per page")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--plain", action="store_true", help="generate prose without inline markup")
+    parser.add_argument("--mix", default=None,
+                        help="block weights, e.g. paragraph=6,list=2,code=1,quote=1,heading=2,link_paragraph=2,olist=1")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="worker processes for the end-to-end build")
+    parser.add_argument("--stage", action="append", help="only run the named stage (repeatable)")
+    parser.add_argument("--output", default="bench_output.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    parser.add_argument("--pathological", action="store_true",
+                        help="time single calls on worst-case inline and block inputs instead of a corpus")
+    args = parser.parse_args()
+
+    mix = None
+    if args.mix:
+        mix = {name: int(weight) for name, weight in (item.split("=") for item in args.mix.split(","))}
+    corpus = {"pages": args.pages, "blocks": args.blocks, "seed": args.seed, "plain": args.plain, "mix": mix}
+    if args.pathological:
+        corpus = "pathological"
+        results = run_pathological_benchmarks(args.repeat)
+    else:
+        with tempfile.TemporaryDirectory() as root:
+            print(f"Generating {args.pages} synthetic pages...")
+            generate_corpus(root, args.pages, args.blocks, args.seed, mix, markup=not args.plain)
+            results = run_benchmarks(root, args.repeat, args.jobs, args.stage)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)["stages"]
+    print_results(results, baseline)
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": corpus,
+        "repeat": args.repeat,
+        "jobs": args.jobs,
+        "stages": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
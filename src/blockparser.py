@@ -1,7 +1,9 @@
 from enum import Enum
-from htmlnode import  ParentNode
-from textnode import TextType, TextNode, text_node_to_html_node
-from textparser import text_to_textnodes
+from itertools import repeat
+from htmlnode import LeafNode, ParentNode, leaf_html
+from syntax import CODE_FENCE, HEADING_PREFIXES, INLINE_MARKUP_PATTERN, OLIST_PREFIXES, QUOTE_PREFIX, ULIST_PREFIX
+from textnode import TextType, text_node_to_html, text_node_to_html_node
+from textparser import text_to_textnodes, texts_to_textnodes
 
 
 class BlockType(Enum):
@@ -12,145 +14,407 @@ class BlockType(Enum):
     ULIST = "unordered_list"
     OLIST = "ordered_list"
 
-def markdown_to_blocks(markdown):
+class Block:
+    __slots__ = ("block_type", "lines", "start", "end")
+
+    def __init__(self, block_type, lines, start, end):
+        self.block_type = block_type
+        self.lines = lines
+        self.start = start
+        self.end = end
+
+    @property
+    def text(self):
+        return "\n".join(self.lines)
+
+    def __eq__(self, other):
+        return (self.block_type, self.lines, self.start, self.end) == (other.block_type, other.lines, other.start, other.end)
+
+    def __repr__(self):
+        return f"Block({self.block_type.value}, {self.start}, {self.end}, {self.lines})"
+
+def scan_blocks(markdown):
+    # Blocks are runs of non-empty lines; start and end index the source
+    # lines (end exclusive) after \r\n has been normalised to \n
+    if "\r" in markdown:
+        markdown = markdown.replace("\r\n", "\n")
+    lines = markdown.split("\n")
+    last = len(lines)
+    lines.append("")
     blocks = []
-    splits = markdown.split("\n\n")
-    for item in splits:
-        if item == "":
-            continue
-        item = item.strip()
-        blocks.append(item)
+    start = 0
+    while start < last:
+        # list.index finds the next blank line without a Python-level loop
+        end = lines.index("", start)
+        if end > start:
+            block = lines_to_block(lines, start, end)
+            if block is not None:
+                blocks.append(block)
+        start = end + 1
     return blocks
 
+def iter_blocks(lines):
+    # Streaming counterpart of scan_blocks for an iterable of lines without
+    # their newlines; only the lines of the current block are held
+    pending = []
+    offset = 0
+    for line in lines:
+        if line.endswith("\r"):
+            line = line[:-1]
+        if line:
+            pending.append(line)
+            continue
+        if pending:
+            block = lines_to_block(pending, 0, len(pending), offset)
+            if block is not None:
+                yield block
+        offset += len(pending) + 1
+        pending = []
+    if pending:
+        block = lines_to_block(pending, 0, len(pending), offset)
+        if block is not None:
+            yield block
+
+def lines_to_block(lines, start, end, offset=0):
+    # Same trimming as str.strip() on the joined block
+    while start < end and lines[start].isspace():
+        start += 1
+    while end > start and lines[end - 1].isspace():
+        end -= 1
+    if start == end:
+        return None
+    block_lines = lines[start:end]
+    block_lines[0] = block_lines[0].lstrip()
+    block_lines[-1] = block_lines[-1].rstrip()
+    return Block(classify_lines(block_lines), block_lines, start + offset, end + offset)
+
+def markdown_to_blocks(markdown):
+    return [block.text for block in scan_blocks(markdown)]
+
 def block_to_block_type(block):
-    splits = block.split("\n")
-    index = 0
+    return classify_lines(block.split("\n"))
+
+def lines_start_with(lines, prefix):
+    return all(map(str.startswith, lines, repeat(prefix)))
 
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
-        return BlockType.HEADING
+def classify_heading(lines):
+    return BlockType.HEADING if lines[0].startswith(HEADING_PREFIXES) else BlockType.PARAGRAPH
 
-    if len(splits) > 1 and splits[0].startswith("```") and splits[-1].startswith("```"):
+def classify_code(lines):
+    if len(lines) > 1 and lines[0].startswith(CODE_FENCE) and lines[-1].startswith(CODE_FENCE):
         return BlockType.CODE
+    return BlockType.PARAGRAPH
+
+def classify_quote(lines):
+    return BlockType.QUOTE if lines_start_with(lines, QUOTE_PREFIX) else BlockType.PARAGRAPH
 
-    if block.startswith(">"):
-        while index < len(splits):
-            if splits[index][0] != ">":
-                break
-            if index == len(splits) - 1:
-                return BlockType.QUOTE
-            index += 1
-
-    if block.startswith("- "):
-        while index < len(splits):
-            if splits[index][:2] != "- ":
-                break
-            if index == len(splits) - 1:
-                return BlockType.ULIST
-            index += 1
-
-    if block.startswith("1. "):
-        while index < len(splits):
-            if splits[index][:3] != f"{index+1}. ":
-                break
-            if index == len(splits) - 1:
-                return BlockType.OLIST
-            index += 1
+def classify_ulist(lines):
+    return BlockType.ULIST if lines_start_with(lines, ULIST_PREFIX) else BlockType.PARAGRAPH
 
+def classify_olist(lines):
+    if len(lines) <= len(OLIST_PREFIXES) and [line[:3] for line in lines] == OLIST_PREFIXES[:len(lines)]:
+        return BlockType.OLIST
     return BlockType.PARAGRAPH
 
+# Every block syntax has a distinct first character, so one lookup picks
+# the only check that can succeed
+BLOCK_CLASSIFIERS = {
+    HEADING_PREFIXES[0][0]: classify_heading,
+    CODE_FENCE[0]: classify_code,
+    QUOTE_PREFIX[0]: classify_quote,
+    ULIST_PREFIX[0]: classify_ulist,
+    OLIST_PREFIXES[0][0]: classify_olist,
+}
+
+def classify_lines(lines):
+    classify = BLOCK_CLASSIFIERS.get(lines[0][:1])
+    if classify is None:
+        return BlockType.PARAGRAPH
+    return classify(lines)
+
+def text_nodes_to_html_node(tag, text_nodes):
+    # A lone plain node renders the same as a leaf holding its text, which
+    # skips a LeafNode per block and a level of write_html calls
+    if len(text_nodes) == 1 and text_nodes[0].text_type == TextType.PLAIN:
+        return LeafNode(tag=tag, value=text_nodes[0].text)
+    return ParentNode(tag=tag, children=[text_node_to_html_node(text_node) for text_node in text_nodes])
+
+def inline_to_html_node(tag, text):
+    if text and INLINE_MARKUP_PATTERN.search(text) is None:
+        return LeafNode(tag=tag, value=text)
+    return text_nodes_to_html_node(tag, text_to_textnodes(text))
+
+def heading_text(lines):
+    first = lines[0]
+    level = len(first) - len(first.lstrip("#"))
+    return level, "\n".join(lines)[level+1:].rstrip()
+
+def paragraph_text(lines):
+    return " ".join(lines)
+
+def code_text(lines):
+    return "\n".join([line for line in lines if line != "```"]).rstrip()
+
+def quote_text(lines):
+    return " ".join([line.strip(">").strip() for line in lines]).strip()
+
+def ulist_texts(lines):
+    return [line.strip("-").strip() for line in lines]
+
+def olist_texts(lines):
+    return [line.lstrip(f"{index+1}.").strip() for index, line in enumerate(lines)]
+
+def lines_to_heading_node(lines):
+    level, text = heading_text(lines)
+    return inline_to_html_node(f"h{level}", text)
+
+def lines_to_paragraph_node(lines):
+    return inline_to_html_node("p", paragraph_text(lines))
+
+def lines_to_code_node(lines):
+    code_node = LeafNode(tag="code", value=code_text(lines))
+    return ParentNode(tag="pre", children=[code_node])
+
+def lines_to_quote_node(lines):
+    return inline_to_html_node("blockquote", quote_text(lines))
+
+def lines_to_ulist_node(lines):
+    list_items = [text_nodes_to_html_node("li", text_nodes) for text_nodes in texts_to_textnodes(ulist_texts(lines))]
+    return ParentNode(tag="ul", children=list_items)
+
+def lines_to_olist_node(lines):
+    list_items = [text_nodes_to_html_node("li", text_nodes) for text_nodes in texts_to_textnodes(olist_texts(lines))]
+    return ParentNode(tag="ol", children=list_items)
+
+LINES_TO_NODE = {
+    BlockType.PARAGRAPH: lines_to_paragraph_node,
+    BlockType.HEADING: lines_to_heading_node,
+    BlockType.CODE: lines_to_code_node,
+    BlockType.QUOTE: lines_to_quote_node,
+    BlockType.ULIST: lines_to_ulist_node,
+    BlockType.OLIST: lines_to_olist_node,
+}
+
+def scanned_block_to_html_node(block):
+    return LINES_TO_NODE[block.block_type](block.lines)
+
+# The string versions take a block as markdown_to_blocks returns it
+
 def heading_to_html_node(block):
-    level = len(block) - len(block.lstrip("#"))
-    text = block[level+1:].rstrip()
-    text_nodes = text_to_textnodes(text)
-    children = []
-    for text_node in text_nodes:
-        children.append(text_node_to_html_node(text_node))
-    return ParentNode(tag=f"h{level}", children=children)
+    return lines_to_heading_node(block.split("\n"))
 
 def paragraph_to_html_node(block):
-    lines = block.split("\n")
-    text = ""
-    for line in lines:
-        text += line + " "
-    text = text.strip()
-    text_nodes = text_to_textnodes(text)
-    children = []
-    for text_node in text_nodes:
-        children.append(text_node_to_html_node(text_node))
-    return ParentNode(tag="p", children=children)
+    return lines_to_paragraph_node(block.split("\n"))
 
 def code_to_html_node(block):
-    lines = block.split("\n")
-    text = []
-    for line in lines:
-        if line == "```":
-            continue
-        text.append(line) 
-    text = "\n".join(text).rstrip()
-    text_node = TextNode(text, TextType.PLAIN)
-    code_child = text_node_to_html_node(text_node)
-    code_node = ParentNode(tag="code", children=[code_child])
-    return ParentNode(tag="pre", children=[code_node])
+    return lines_to_code_node(block.split("\n"))
 
 def quote_to_html_node(block):
-    lines = block.split("\n")
-    text = ""
-    for line in lines:
-        text += line.strip(">").strip() + " "
-    text = text.strip()
-    text_nodes = text_to_textnodes(text)
-    children = []
-    for text_node in text_nodes:
-        children.append(text_node_to_html_node(text_node))
-    return ParentNode(tag="blockquote", children=children)
+    return lines_to_quote_node(block.split("\n"))
 
 def ulist_to_html_node(block):
-    lines = block.split("\n")
-    list_items = []
-    for line in lines:
-        text = line.strip("-").strip()
-        text_nodes = text_to_textnodes(text)
-        children = []
-        for text_node in text_nodes:
-            children.append(text_node_to_html_node(text_node))
-        list_items.append(ParentNode(tag="li", children=children))
-    return ParentNode(tag="ul", children=list_items)
+    return lines_to_ulist_node(block.split("\n"))
 
 def olist_to_html_node(block):
-    lines = block.split("\n")
-    list_items = []
-    for index in range(len(lines)):
-        text = lines[index].lstrip(f"{index+1}.").strip()
-        text_nodes = text_to_textnodes(text)
-        children = []
-        for text_node in text_nodes:
-            children.append(text_node_to_html_node(text_node))
-        list_items.append(ParentNode(tag="li", children=children))
-    return ParentNode(tag="ol", children=list_items)
+    return lines_to_olist_node(block.split("\n"))
 
 def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+    lines = block.split("\n")
+    return LINES_TO_NODE[classify_lines(lines)](lines)
+
+def write_text_nodes_html(tag, text_nodes, write, images, links):
+    # Writes what text_nodes_to_html_node would render and records the
+    # images and links on the way
+    if len(text_nodes) < 1:
+        raise ValueError("HTML tag has no children")
+    write(f"<{tag}>")
+    for text_node in text_nodes:
+        if text_node.text_type == TextType.IMAGE:
+            images.append(text_node.url)
+        elif text_node.text_type == TextType.LINK:
+            links.append(text_node.url)
+        write(text_node_to_html(text_node))
+    write(f"</{tag}>")
+
+def write_inline_html(tag, text, write, images, links):
+    if text and INLINE_MARKUP_PATTERN.search(text) is None:
+        write(leaf_html(tag, text))
+        return
+    write_text_nodes_html(tag, text_to_textnodes(text), write, images, links)
+
+def write_list_html(tag, texts, write, images, links):
+    write(f"<{tag}>")
+    for text_nodes in texts_to_textnodes(texts):
+        write_text_nodes_html("li", text_nodes, write, images, links)
+    write(f"</{tag}>")
 
-    match block_type:
+def write_block_html(block, write, images, links):
+    # Renders a block straight to html, with the same output as
+    # scanned_block_to_html_node(block).to_html() but no node tree
+    lines = block.lines
+    match block.block_type:
         case BlockType.PARAGRAPH:
-            return paragraph_to_html_node(block)
+            write_inline_html("p", paragraph_text(lines), write, images, links)
         case BlockType.HEADING:
-            return heading_to_html_node(block)
+            level, text = heading_text(lines)
+            write_inline_html(f"h{level}", text, write, images, links)
         case BlockType.CODE:
-            return code_to_html_node(block)
+            write(f"<pre>{leaf_html('code', code_text(lines))}</pre>")
         case BlockType.QUOTE:
-            return quote_to_html_node(block)
+            write_inline_html("blockquote", quote_text(lines), write, images, links)
         case BlockType.ULIST:
-            return ulist_to_html_node(block)
+            write_list_html("ul", ulist_texts(lines), write, images, links)
         case BlockType.OLIST:
-            return olist_to_html_node(block)
+            write_list_html("ol", olist_texts(lines), write, images, links)
 
-def markdown_to_html_node(markdown):
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+class MarkdownDocument:
+    def __init__(self, node, title=None, headings=None, word_count=0, images=None, links=None):
+        self.node = node
+        self.title = title
+        self.headings = headings if headings is not None else []
+        self.word_count = word_count
+        self.images = images if images is not None else []
+        self.links = links if links is not None else []
+
+    def __repr__(self):
+        return f"MarkdownDocument({self.title}, {self.headings}, {self.word_count})"
+
+def node_text(node):
+    if node.children is None:
+        return node.value
+    return "".join(node_text(child) for child in node.children)
+
+def node_word_count(node):
+    if node.tag in ("ul", "ol"):
+        return sum(node_word_count(child) for child in node.children)
+    return len(node_text(node).split())
+
+def node_references(node, images, links):
+    if node.children is None:
+        if node.tag == "img":
+            images.append(node.props["src"])
+        elif node.tag == "a":
+            links.append(node.props["href"])
+        return
+    for child in node.children:
+        node_references(child, images, links)
+
+def parse_markdown(markdown):
     nodes = []
-    blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        block_node = block_to_html_node(block)
+    title = None
+    headings = []
+    word_count = 0
+    images = []
+    links = []
+    for block in scan_blocks(markdown):
+        block_node = scanned_block_to_html_node(block)
         nodes.append(block_node)
+        word_count += node_word_count(block_node)
+        if block.block_type != BlockType.CODE:
+            node_references(block_node, images, links)
+        if block_node.tag in HEADING_TAGS:
+            level = int(block_node.tag[1])
+            text = node_text(block_node)
+            headings.append((level, text))
+            if level == 1 and title is None:
+                title = text
     parent = ParentNode(tag="div", children=nodes)
-    return parent
+    return MarkdownDocument(parent, title, headings, word_count, images, links)
+
+def blocks_title(blocks):
+    # Only the first h1 is parsed, so a title can be found without
+    # rendering the rest of the document
+    for block in blocks:
+        if block.block_type == BlockType.HEADING and block.lines[0].startswith("# "):
+            return node_text(lines_to_heading_node(block.lines))
+    return None
+
+class BlockStream:
+    # Stands in for the document's div node, rendering each block as it
+    # is written so only one block is held in memory at a time
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.images = []
+        self.links = []
+
+    def write_html(self, write):
+        write("<div>")
+        for block in self.blocks:
+            write_block_html(block, write, self.images, self.links)
+        write("</div>")
+
+    def __repr__(self):
+        return f"BlockStream({self.blocks})"
+
+class LazyDocument:
+    # Keeps a page as its block records. Rendering goes straight from the
+    # blocks to a string; the node tree is only built for callers that
+    # walk it, such as headings or word counts
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.html = None
+        self.tree = None
+        self.found_title = False
+        self.first_title = None
+        self.references = None
+
+    @property
+    def title(self):
+        if not self.found_title:
+            self.first_title = blocks_title(self.blocks)
+            self.found_title = True
+        return self.first_title
+
+    @property
+    def node(self):
+        if self.tree is None:
+            self.tree = ParentNode(tag="div", children=[scanned_block_to_html_node(block) for block in self.blocks])
+        return self.tree
+
+    @property
+    def headings(self):
+        block_nodes = self.node.children
+        return [(int(block_node.tag[1]), node_text(block_node)) for block_node in block_nodes if block_node.tag in HEADING_TAGS]
+
+    @property
+    def word_count(self):
+        return sum(node_word_count(block_node) for block_node in self.node.children)
+
+    @property
+    def images(self):
+        self.to_html()
+        return self.references[0]
+
+    @property
+    def links(self):
+        self.to_html()
+        return self.references[1]
+
+    def to_html(self):
+        if self.html is None:
+            if len(self.blocks) < 1:
+                raise ValueError("HTML tag has no children")
+            parts = ["<div>"]
+            images = []
+            links = []
+            for block in self.blocks:
+                write_block_html(block, parts.append, images, links)
+            parts.append("</div>")
+            self.html = "".join(parts)
+            self.references = (images, links)
+        return self.html
+
+    def write_html(self, write):
+        write(self.to_html())
+
+    def __repr__(self):
+        return f"LazyDocument({len(self.blocks)} blocks, rendered={self.html is not None}, tree={self.tree is not None})"
+
+def parse_markdown_lazy(markdown):
+    return LazyDocument(list(scan_blocks(markdown)))
+
+def markdown_to_html_node(markdown):
+    return parse_markdown(markdown).node
 
@@ -0,0 +1,100 @@
+import os
+import random
+
+WORDS = (
+    "the of and to in is was that for on as with by at from hobbit ring elf dwarf wizard "
+    "road forest river mountain shire valley tower council journey shadow light song "
+    "ancient quiet golden grey long little old bright dark swift"
+).split()
+BLOCK_KINDS = ["heading", "paragraph", "link_paragraph", "list", "olist", "code", "quote"]
+DEFAULT_MIX = {
+    "heading": 2,
+    "paragraph": 6,
+    "link_paragraph": 2,
+    "list": 2,
+    "olist": 1,
+    "code": 1,
+    "quote": 1,
+}
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+
+def words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+def inline_text(rng, count, markup=True):
+    parts = []
+    for _ in range(count):
+        roll = rng.random() if markup else 1.0
+        if roll < 0.05:
+            parts.append(f"**{words(rng, 2)}**")
+        elif roll < 0.10:
+            parts.append(f"_{words(rng, 2)}_")
+        elif roll < 0.13:
+            parts.append(f"`{rng.choice(WORDS)}`")
+        elif roll < 0.15:
+            parts.append(f"[{words(rng, 2)}](/pages/{rng.randrange(1000)})")
+        else:
+            parts.append(rng.choice(WORDS))
+    return " ".join(parts)
+
+def synthetic_block(rng, kind, markup=True):
+    if kind == "heading":
+        return f"{'#' * rng.randint(2, 4)} {inline_text(rng, rng.randint(2, 6), markup)}"
+    if kind == "paragraph":
+        lines = [inline_text(rng, rng.randint(8, 14), markup) for _ in range(rng.randint(2, 6))]
+        return "\n".join(lines)
+    if kind == "link_paragraph":
+        links = [f"[{words(rng, 2)}](/pages/{rng.randrange(10000)})" for _ in range(rng.randint(20, 60))]
+        return " and ".join(links)
+    if kind == "list":
+        return "\n".join(f"- {inline_text(rng, rng.randint(3, 10), markup)}" for _ in range(rng.randint(3, 12)))
+    if kind == "olist":
+        return "\n".join(f"{i + 1}. {inline_text(rng, rng.randint(3, 10), markup)}" for i in range(rng.randint(3, 9)))
+    if kind == "code":
+        lines = [f"    {words(rng, rng.randint(2, 6))}" for _ in range(rng.randint(3, 15))]
+        return "```\n" + "\n".join(lines) + "\n```"
+    if kind == "quote":
+        return "\n".join(f"> {inline_text(rng, rng.randint(5, 12), markup)}" for _ in range(rng.randint(1, 4)))
+    raise ValueError(f"{kind}: Not a valid block kind")
+
+def synthetic_page(rng, blocks=20, mix=None, markup=True):
+    mix = mix or DEFAULT_MIX
+    kinds = [kind for kind in BLOCK_KINDS if mix.get(kind, 0) > 0]
+    weights = [mix[kind] for kind in kinds]
+    parts = [f"# {words(rng, rng.randint(2, 5)).title()}"]
+    for kind in rng.choices(kinds, weights, k=blocks):
+        parts.append(synthetic_block(rng, kind, markup))
+    return "\n\n".join(parts) + "\n"
+
+def generate_corpus(root, pages=1000, blocks=20, seed=0, mix=None, static_files=20, static_size=64 * 1024, markup=True):
+    # The same arguments always produce byte-identical trees
+    rng = random.Random(seed)
+    content_dir = os.path.join(root, "content")
+    static_dir = os.path.join(root, "static")
+    for index in range(pages):
+        page_dir = os.path.join(content_dir, f"section{index % 50:02d}", f"page{index:05d}")
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, "index.md"), "w") as f:
+            f.write(synthetic_page(rng, blocks, mix, markup))
+    os.makedirs(os.path.join(static_dir, "images"), exist_ok=True)
+    with open(os.path.join(static_dir, "index.css"), "w") as f:
+        f.write("body { font-family: serif; }\n")
+    for index in range(static_files):
+        with open(os.path.join(static_dir, "images", f"image{index:04d}.png"), "wb") as f:
+            f.write(rng.randbytes(static_size))
+    template_path = os.path.join(root, "template.html")
+    with open(template_path, "w") as f:
+        f.write(TEMPLATE)
+    return content_dir, static_dir, template_path
@@ -0,0 +1,104 @@
+import os
+from manifest import load_manifest
+
+
+def normalize(path):
+    return os.path.normpath(str(path))
+
+
+class DependencyGraph:
+    # Records what each generated page was built from: its source, the
+    # template and the images and links it references. Only the forward
+    # entries are persisted; the reverse indexes are rebuilt on load so a
+    # changed file maps to its outputs without scanning every page
+    def __init__(self):
+        self.outputs = {}
+        self.by_source = {}
+        self.by_template = {}
+        self.by_reference = {}
+
+    def add_page(self, output, source, template, images=(), links=()):
+        output = normalize(output)
+        self.remove(output)
+        entry = {
+            "source": normalize(source),
+            "template": normalize(template),
+            "images": list(dict.fromkeys(images)),
+            "links": list(dict.fromkeys(links)),
+        }
+        self.outputs[output] = entry
+        self.by_source.setdefault(entry["source"], set()).add(output)
+        self.by_template.setdefault(entry["template"], set()).add(output)
+        for url in entry["images"] + entry["links"]:
+            self.by_reference.setdefault(url, set()).add(output)
+
+    def remove(self, output):
+        output = normalize(output)
+        entry = self.outputs.pop(output, None)
+        if entry is None:
+            return
+        self.discard(self.by_source, entry["source"], output)
+        self.discard(self.by_template, entry["template"], output)
+        for url in entry["images"] + entry["links"]:
+            self.discard(self.by_reference, url, output)
+
+    def discard(self, index, key, output):
+        outputs = index.get(key)
+        if outputs is None:
+            return
+        outputs.discard(output)
+        if not outputs:
+            del index[key]
+
+    def source_of(self, output):
+        entry = self.outputs.get(normalize(output))
+        return None if entry is None else entry["source"]
+
+    def dependencies(self, output):
+        return self.outputs.get(normalize(output))
+
+    def outputs_for_source(self, source):
+        return sorted(self.by_source.get(normalize(source), ()))
+
+    def outputs_for_template(self, template):
+        return sorted(self.by_template.get(normalize(template), ()))
+
+    def sources(self):
+        return sorted(self.by_source)
+
+    def pages_referencing(self, url):
+        return sorted(self.by_reference.get(url, ()))
+
+    def affected_outputs(self, paths):
+        # Pages that must be re-rendered when the given files change; static
+        # files are copied as they are, so they never force a page rebuild
+        affected = set()
+        for path in paths:
+            path = normalize(path)
+            affected.update(self.by_source.get(path, ()))
+            affected.update(self.by_template.get(path, ()))
+        return sorted(affected)
+
+    def to_dict(self):
+        return {output: self.outputs[output] for output in sorted(self.outputs)}
+
+    @classmethod
+    def from_dict(cls, data):
+        graph = cls()
+        for output, entry in (data or {}).items():
+            graph.add_page(output, entry["source"], entry["template"], entry.get("images", []), entry.get("links", []))
+        return graph
+
+    def __repr__(self):
+        return f"DependencyGraph({len(self.outputs)} outputs, {len(self.by_template)} templates, {len(self.by_reference)} references)"
+
+
+def load_graph(manifest_path):
+    graph = load_manifest(manifest_path).get("graph")
+    if not isinstance(graph, dict):
+        return DependencyGraph()
+    try:
+        return DependencyGraph.from_dict(graph)
+    except (KeyError, TypeError, AttributeError):
+        print(f"Ignoring unreadable dependency graph in {manifest_path}")
+        return DependencyGraph()
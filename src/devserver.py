@@ -0,0 +1,226 @@
+import argparse
+import asyncio
+import email.utils
+import hashlib
+import mimetypes
+import os
+import posixpath
+import time
+from urllib.parse import unquote, urlsplit
+from gencontent import find_pages, render_markdown
+from rendercache import MemoryRenderCache
+from template import load_template
+from watcher import create_watcher
+
+static_dir = "./static/"
+content_dir = "./content/"
+template_path = "./template.html"
+
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = (
+    "<script>new EventSource(\"" + LIVE_RELOAD_PATH + "\")"
+    ".onmessage = function () { location.reload(); };</script>"
+)
+STATUS_TEXT = {200: "OK", 304: "Not Modified", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class DevSite:
+    def __init__(self, content_dir, static_dir, template_path):
+        self.content_dir = os.path.normpath(content_dir)
+        self.static_dir = os.path.normpath(static_dir)
+        self.template_path = os.path.normpath(template_path)
+        self.template = load_template(self.template_path)
+        self.cache = MemoryRenderCache()
+        self.pages = {}
+        self.routes = {}
+        self.refresh_routes()
+
+    def refresh_routes(self):
+        self.routes = {}
+        for src_path, dst_path in find_pages(self.content_dir, "/"):
+            self.routes[url_for_output(dst_path)] = src_path
+
+    def invalidate(self, paths):
+        if self.template_path in paths:
+            self.template = load_template(self.template_path)
+            self.pages = {}
+        known_sources = set(self.routes.values())
+        for path in paths:
+            self.pages.pop(path, None)
+            if path == self.content_dir or path.startswith(self.content_dir + os.sep):
+                # Added, removed or renamed pages change the route table
+                if not os.path.isfile(path) or path not in known_sources:
+                    self.refresh_routes()
+                    known_sources = set(self.routes.values())
+
+    def resolve(self, url_path):
+        if url_path.endswith("/"):
+            url_path += "index.html"
+        if url_path in self.routes:
+            return "page", self.routes[url_path]
+        if posixpath.splitext(url_path)[1] == "" and url_path + "/index.html" in self.routes:
+            return "page", self.routes[url_path + "/index.html"]
+        parts = [part for part in url_path.split("/") if part not in ("", ".", "..")]
+        static_path = os.path.join(self.static_dir, *parts)
+        if os.path.isfile(static_path):
+            return "static", static_path
+        return None, None
+
+    def render_page(self, src_path):
+        page = self.pages.get(src_path)
+        if page is not None:
+            return page, None
+        start = time.perf_counter()
+        with open(src_path, "r") as f:
+            markdown = f.read()
+        title, content, _ = render_markdown(markdown, self.cache)
+        html = self.template.render(title, content)
+        html = html.replace("</body>", LIVE_RELOAD_SCRIPT + "</body>", 1)
+        body = html.encode("utf-8")
+        page = (body, f'"{hashlib.sha1(body).hexdigest()[:16]}"')
+        self.pages[src_path] = page
+        return page, (time.perf_counter() - start) * 1000
+
+    def __repr__(self):
+        return f"DevSite({self.content_dir}, {self.static_dir}, {self.template_path}, {len(self.routes)} pages)"
+
+
+def url_for_output(dst_path):
+    # find_pages(content_dir, "/") yields absolute-looking output paths
+    return "/" + "/".join(part for part in str(dst_path).split(os.sep) if part)
+
+
+class DevServer:
+    def __init__(self, site, watcher=None):
+        self.site = site
+        self.watcher = watcher
+        self.clients = set()
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            parts = request_line.decode("latin-1").split()
+            if len(parts) < 2:
+                return
+            method, target = parts[0], parts[1]
+            url_path = unquote(urlsplit(target).path)
+            if method not in ("GET", "HEAD"):
+                await self.respond(writer, 405, b"method not allowed\n", {"Content-Type": "text/plain"})
+                return
+            if url_path == LIVE_RELOAD_PATH:
+                await self.live_reload(writer)
+                return
+            await self.serve(writer, method, url_path, headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, writer, method, url_path, headers):
+        kind, path = self.site.resolve(url_path)
+        if kind is None:
+            print(f"{method} {url_path} 404")
+            await self.respond(writer, 404, b"not found\n", {"Content-Type": "text/plain"})
+            return
+        if kind == "page":
+            try:
+                (body, etag), elapsed = self.site.render_page(path)
+            except Exception as e:
+                print(f"{method} {url_path} 500 {path}: {e}")
+                await self.respond(writer, 500, f"Unable to generate {path}: {e}\n".encode("utf-8"), {"Content-Type": "text/plain"})
+                return
+            extra = {"Content-Type": "text/html; charset=utf-8", "ETag": etag, "Cache-Control": "no-cache"}
+            if elapsed is None:
+                print(f"{method} {url_path} 200 {path} from memory")
+            else:
+                extra["Server-Timing"] = f"render;dur={elapsed:.2f}"
+                print(f"{method} {url_path} 200 {path} rendered in {elapsed:.2f}ms")
+            if headers.get("if-none-match") == etag:
+                await self.respond(writer, 304, b"", extra, head=True)
+                return
+            await self.respond(writer, 200, body, extra, head=method == "HEAD")
+            return
+
+        stat = os.stat(path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        extra = {"Content-Type": content_type, "ETag": etag, "Last-Modified": last_modified, "Cache-Control": "no-cache"}
+        if headers.get("if-none-match") == etag or (
+                "if-none-match" not in headers and headers.get("if-modified-since") == last_modified):
+            await self.respond(writer, 304, b"", extra, head=True)
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        await self.respond(writer, 200, body, extra, head=method == "HEAD")
+
+    async def respond(self, writer, status, body, headers, head=False):
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}", f"Content-Length: {len(body)}", "Connection: close"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if not head:
+            writer.write(body)
+        await writer.drain()
+
+    async def live_reload(self, writer):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n\r\n")
+        await writer.drain()
+        queue = asyncio.Queue()
+        self.clients.add(queue)
+        try:
+            while True:
+                await queue.get()
+                writer.write(b"data: reload\n\n")
+                await writer.drain()
+        finally:
+            self.clients.discard(queue)
+
+    async def watch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            changed = await loop.run_in_executor(None, self.watcher.wait, 1.0)
+            if not changed:
+                continue
+            print(f"Changed: {', '.join(sorted(changed))}")
+            self.site.invalidate(changed)
+            for queue in list(self.clients):
+                queue.put_nowait("reload")
+
+    async def run(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving on http://{host}:{port}/ (Ctrl-C to stop)")
+        async with server:
+            if self.watcher is not None:
+                await asyncio.gather(server.serve_forever(), self.watch())
+            else:
+                await server.serve_forever()
+
+    def __repr__(self):
+        return f"DevServer({self.site}, {self.watcher})"
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="devserver")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--poll", action="store_true", help="poll for changes instead of using inotify")
+    args = parser.parse_args()
+
+    site = DevSite(content_dir, static_dir, template_path)
+    watcher = create_watcher([site.content_dir, site.static_dir], [site.template_path], args.poll)
+    try:
+        asyncio.run(DevServer(site, watcher).run(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+if __name__ == "__main__":
+    main()
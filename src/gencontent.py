@@ -1,57 +1,194 @@
+import io
 import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from functools import partial
 from pathlib import Path
-from blockparser import BlockType, markdown_to_html_node, markdown_to_blocks, block_to_block_type, heading_to_html_node
+from blockparser import BlockStream, blocks_title, iter_blocks, parse_markdown_lazy
+from depgraph import load_graph
+from outputfile import OutputFile
+from profiler import NullTimer, StageTimer
+from shard import in_shard
+from sourcefile import iter_source_lines, read_source
+from manifest import hash_file, load_manifest, page_entry, remove_output, update_manifest
+from template import load_template
 
-def generate_content_recursive(src_dir, template_path, dst_dir, basepath):
-    if not os.path.exists(dst_dir):
-        os.makedirs(dst_dir, exist_ok=True)
-    contents = os.listdir(src_dir)
-    for item in contents:
+# Sources at least this large are rendered block by block instead of being
+# read, parsed and cached as a whole
+STREAM_THRESHOLD = 4 * 1024 * 1024
+
+def find_pages(src_dir, dst_dir):
+    pages = []
+    for item in sorted(os.listdir(src_dir)):
         subpath_src = os.path.join(src_dir, item)
         subpath_dst = os.path.join(dst_dir, item)
         if os.path.isdir(subpath_src):
-            generate_content_recursive(subpath_src, template_path, subpath_dst, basepath)
+            pages.extend(find_pages(subpath_src, subpath_dst))
         elif os.path.isfile(subpath_src):
-            subpath_dst = Path(subpath_dst).with_suffix(".html")
-            generate_page(subpath_src, template_path, subpath_dst, basepath)
+            pages.append((subpath_src, Path(subpath_dst).with_suffix(".html")))
+    return pages
+
+def generate_content_recursive(src_dir, template_path, dst_dir, basepath, jobs=1, cache=None, profiler=None):
+    if not os.path.exists(dst_dir):
+        os.makedirs(dst_dir, exist_ok=True)
+    return render_pages(find_pages(src_dir, dst_dir), template_path, basepath, jobs, cache, profiler)
+
+def render_pages(pages, template_path, basepath, jobs=1, cache=None, profiler=None, graph=None):
+    # Returns how many output files actually changed on disk
+    if len(pages) == 0:
+        return 0
+    template = load_template(template_path, basepath)
+    render = partial(render_page_task, template=template, cache=cache, profile=profiler is not None)
+    executor = None
+    if jobs <= 1 or len(pages) <= 1:
+        results = map(render, pages)
+    else:
+        # map() yields in submission order, so logs and the first reported
+        # failure are the same as in a serial build
+        chunksize = max(1, len(pages) // (jobs * 4))
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        results = executor.map(render, pages, chunksize=chunksize)
+    written = 0
+    try:
+        for (src_path, dst_path), (log, changed, references, spans, pid) in zip(pages, results):
+            print(log, end="")
+            written += changed
+            if graph is not None:
+                graph.add_page(dst_path, src_path, template_path, references["images"], references["links"])
+            if profiler is not None:
+                profiler.add_page(src_path, spans, pid)
+    except BaseException:
+        # Every page was submitted up front, so drop the ones no worker
+        # has started rather than rendering the rest of the site
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        raise
+    if executor is not None:
+        executor.shutdown()
+    return written
+
+def render_page_task(page, template, cache=None, profile=False):
+    src_path, dst_path = page
+    log = io.StringIO()
+    timer = StageTimer() if profile else NullTimer()
+    try:
+        with redirect_stdout(log):
+            changed, references = generate_page(src_path, template.path, dst_path, template.basepath, template, cache, timer)
+    except Exception as e:
+        raise Exception(f"Unable to generate {src_path}: {e}") from e
+    return log.getvalue(), changed, references, getattr(timer, "spans", None), os.getpid()
+
+def generate_content_incremental(src_dir, template_path, dst_dir, basepath, manifest_path, full=False, jobs=1, cache=None,
+                                 profiler=None, shard=None):
+    # A full build still reads the manifest so outputs of deleted sources
+    # are removed
+    old_pages = {os.path.normpath(path): entry for path, entry in load_manifest(manifest_path)["pages"].items()}
+    graph = load_graph(manifest_path)
+    if not os.path.exists(dst_dir):
+        os.makedirs(dst_dir, exist_ok=True)
+    template_hash = hash_file(template_path)
+
+    new_pages = {}
+    pages = []
+    changed_outputs = set()
+    changed_inputs = set()
+    for src_path, dst_path in find_pages(src_dir, dst_dir):
+        if not in_shard(src_path, src_dir, shard):
+            continue
+        entry = page_entry(src_path, template_hash, basepath)
+        output = os.path.normpath(dst_path)
+        new_pages[output] = entry
+        pages.append((src_path, dst_path))
+        old_entry = old_pages.get(output, {})
+        dependencies = graph.dependencies(output)
+        # Pages missing from the graph are rebuilt so their dependencies
+        # get recorded
+        if (full or dependencies is None or not os.path.exists(dst_path) or old_entry.get("basepath") != basepath
+                or dependencies["source"] != entry["source"]
+                or dependencies["template"] != os.path.normpath(template_path)):
+            changed_outputs.add(output)
+            continue
+        if old_entry.get("source_hash") != entry["source_hash"]:
+            changed_inputs.add(entry["source"])
+        if old_entry.get("template_hash") != template_hash:
+            changed_inputs.add(dependencies["template"])
+    # The graph maps each changed source or template to the pages built
+    # from it
+    changed_outputs.update(graph.affected_outputs(changed_inputs))
+    changed = [(src_path, dst_path) for src_path, dst_path in pages if os.path.normpath(dst_path) in changed_outputs]
 
-def generate_page(src_path, template_path, dst_path, basepath):
+    removed = [dst_path for dst_path in sorted(old_pages) if dst_path not in new_pages]
+    for dst_path in removed:
+        remove_output(dst_path, dst_dir)
+        graph.remove(dst_path)
+    written = render_pages(changed, template_path, basepath, jobs, cache, profiler, graph)
+
+    update_manifest(manifest_path, pages=new_pages, graph=graph.to_dict())
+    return {
+        "generated": len(changed),
+        "written": written,
+        "unchanged": len(new_pages) - len(changed),
+        "removed": len(removed),
+    }
+
+def generate_page(src_path, template_path, dst_path, basepath, template=None, cache=None, timer=None):
     print(f" * {src_path} -> {dst_path} using {template_path}")
-    f = open(src_path, "r")
-    src_file = f.read()
-    f.close()
-    f = open(template_path, "r")
-    template_file = f.read()
-    f.close()
-    md_conv_html = markdown_to_html_node(src_file).to_html()
-    page_title = extract_heading(src_file)
-    gen_file = template_file.replace("{{ Title }}", page_title)
-    gen_file = gen_file.replace("{{ Content }}", md_conv_html)
-    gen_file = gen_file.replace('href="/', f'href="{basepath}')
-    gen_file = gen_file.replace('src="/', f'src="{basepath}')
+    if timer is None:
+        timer = NullTimer()
+    if template is None:
+        template = load_template(template_path, basepath)
+    if os.path.getsize(src_path) >= STREAM_THRESHOLD:
+        with timer.stage("stream"):
+            return stream_page(src_path, dst_path, template)
+    with timer.stage("read"):
+        src_file = read_source(src_path)
+    with timer.stage("parse"):
+        page_title, content, references = render_markdown(src_file, cache)
+    with timer.stage("serialize and write"):
+        make_dest_dir(dst_path)
+        with OutputFile(dst_path) as f:
+            template.write(f.write, page_title, content)
+    return f.changed, references
+
+def stream_page(src_path, dst_path, template):
+    # The title is found in a first pass so a page without one fails before
+    # anything is written; the second pass renders straight into the output
+    page_title = check_title(blocks_title(read_blocks(src_path)))
+    make_dest_dir(dst_path)
+    content = BlockStream(read_blocks(src_path))
+    with OutputFile(dst_path) as f:
+        template.write(f.write, page_title, content)
+    return f.changed, {"images": content.images, "links": content.links}
+
+def read_blocks(src_path):
+    return iter_blocks(iter_source_lines(src_path))
+
+def make_dest_dir(dst_path):
     dest_dir = os.path.dirname(dst_path)
     try:
         os.makedirs(dest_dir, exist_ok=True)
     except Exception as e:
         raise Exception(f"Unable to create directory {dest_dir}: {e}")
-    with open(dst_path, "w") as f:
-        f.write(gen_file)
-        f.close()
 
-def extract_heading(markdown):
-    blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        if block_type != BlockType.HEADING:
-            continue
-        heading_node = heading_to_html_node(block)
-        if heading_node.tag != "h1":
-            continue
-        if heading_node.children is not None:
-            heading = ""
-            for child in heading_node.children:
-                heading += child.value
-            return heading
-    raise Exception("no h1 heading blocks found in markdown")
+def render_markdown(markdown, cache=None):
+    # Returns the title, the content as html and the images and links the
+    # page references. The html comes straight from the blocks, so no node
+    # tree is built for the page
+    if cache is not None:
+        entry = cache.get(markdown)
+        if entry is not None:
+            return check_title(entry["title"]), entry["html"], entry["references"]
+    document = parse_markdown_lazy(markdown)
+    html = document.to_html()
+    references = {"images": document.images, "links": document.links}
+    if cache is not None:
+        cache.put(markdown, {"title": document.title, "html": html, "references": references})
+    return check_title(document.title), html, references
 
+def extract_heading(markdown):
+    return check_title(parse_markdown_lazy(markdown).title)
 
+def check_title(title):
+    if title is None:
+        raise Exception("no h1 heading blocks found in markdown")
+    return title
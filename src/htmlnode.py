@@ -1,4 +1,20 @@
+def props_html(props):
+    if props is None:
+        return ""
+    return "".join([f' {item}="{props[item]}"' for item in props])
+
+def leaf_html(tag, value, props=None):
+    # The one place leaf markup is written; LeafNode and the direct
+    # renderers in textnode and blockparser all go through it
+    if tag is None:
+        return value
+    return f"<{tag}{props_html(props)}>{value}</{tag}>"
+
+
 class HTMLNode:
+    # Pages build thousands of nodes; slots drop the per-instance __dict__
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -6,51 +22,50 @@ class HTMLNode:
         self.props = props
 
     def to_html(self):
+        parts = []
+        self.write_html(parts.append)
+        return "".join(parts)
+
+    def write_html(self, write):
         raise NotImplementedError("to_html method not implemented")
 
     def props_to_html(self):
-        if self.props is None:
-            return ""
-        string = ""
-        for item in self.props:
-            string += f' {item}="{self.props[item]}"'
-        return string
+        return props_html(self.props)
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag=tag, value=value, children=None, props=props)
 
-    def to_html(self):
+    def write_html(self, write):
         if self.value is None:
             raise ValueError("HTML tag has no value")
-        if self.tag is None:
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+        write(leaf_html(self.tag, self.value, self.props))
 
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag=tag, value=None, children=children, props=props)
 
-    def to_html(self):
+    def write_html(self, write):
         if self.tag is None:
             raise ValueError("HTML item has no tag")
         if self.children is None or len(self.children) < 1:
             raise ValueError("HTML tag has no children")
-        
-        value = f"<{self.tag}{self.props_to_html()}>"
 
+        write(f"<{self.tag}{self.props_to_html()}>")
         for child in self.children:
-            value += child.to_html()
-
-        value += f"</{self.tag}>"
-        return value
+            child.write_html(write)
+        write(f"</{self.tag}>")
 
     def __repr__(self):
         return f"ParentNode({self.tag}, {self.children}, {self.props})"
@@ -1,31 +1,122 @@
 import os
-import sys
+import argparse
+import cProfile
 import shutil
-from copystatic import copy_files_recursive
-from gencontent import generate_content_recursive
+from copystatic import sync_files_recursive
+from gencontent import generate_content_incremental
+from manifest import remove_untracked, update_manifest
+from profiler import BuildProfiler, NullTimer
+from rendercache import RenderCache
+from shard import merge_shard_manifests, parse_shard, parse_shard_count, shard_manifest_path
 
 public_dir = "./docs/"
 static_dir = "./static/"
 content_dir = "./content/"
 template_path = "./template.html"
+build_dir = "./.build/"
+manifest_path = os.path.join(build_dir, "manifest.json")
+render_cache_dir = os.path.join(build_dir, "render-cache")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="main")
+    parser.add_argument("basepath", nargs="?", default="/", help="basepath defaults to /")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only regenerate pages whose source, template or basepath changed")
+    parser.add_argument("--clean", action="store_true",
+                        help="delete the public directory first instead of keeping unchanged files")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N",
+                        help="render pages in N worker processes (0 uses every CPU core)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="parse every page instead of reusing cached renders")
+    parser.add_argument("--link-static", choices=["reflink", "hardlink", "copy"], default="reflink",
+                        help="how changed static files are placed in the public directory")
+    parser.add_argument("--checksum", action="store_true",
+                        help="compare static files by content when their mtimes differ")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each build stage and report the slowest pages")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N",
+                        help="number of slowest pages to report (default 10)")
+    parser.add_argument("--profile-pstats", metavar="PATH",
+                        help="also run cProfile over the build and dump its stats to PATH")
+    parser.add_argument("--profile-trace", metavar="PATH",
+                        help="write stage timings as a Chrome trace-event JSON file to PATH")
+    parser.add_argument("--shard", type=parse_shard, metavar="K/N",
+                        help="build only the pages hashed to shard K of N; shard 1 also copies static files")
+    parser.add_argument("--merge-shards", type=parse_shard_count, metavar="N",
+                        help="combine the manifests of N shard builds, checking no output was written twice")
+    return parser
 
 def main():
-    basepath = "/"
-    args = sys.argv
-    if len(args) > 2:
-        print("Usage: main [basepath]")
-        print("basepath defaults to /")
-        return -1
-    elif len(args) == 2:
-        basepath = args[1]
-    print("Deleting public directory...")
-    if os.path.exists(public_dir):
-        shutil.rmtree(public_dir)
-
-    print("Copying static files...")
-    copy_files_recursive(static_dir, public_dir)
-    print("Generating content...")
-    generate_content_recursive(content_dir,template_path, public_dir, basepath)
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.shard is not None and args.clean:
+        parser.error("--clean would delete the other shards' output")
+
+    if args.merge_shards is not None:
+        totals = merge_shard_manifests(build_dir, args.merge_shards, manifest_path)
+        print(f"Merged {totals['shards']} shards: {totals['pages']} pages ({totals['generated']} generated, "
+              f"{totals['written']} changed on disk), {totals['static']} static files")
+        return
+
+    profiling = args.profile or args.profile_pstats or args.profile_trace
+    profiler = BuildProfiler() if profiling else None
+
+    if args.profile_pstats:
+        # cProfile only sees the main process; use -j 1 to profile rendering
+        with cProfile.Profile() as stats_profiler:
+            build(args, profiler)
+        stats_profiler.dump_stats(args.profile_pstats)
+        print(f"cProfile stats written to {args.profile_pstats}")
+    else:
+        build(args, profiler)
 
-main()
+    if profiler is not None:
+        print(profiler.summary(args.profile_top))
+    if args.profile_trace:
+        profiler.write_trace(args.profile_trace)
+        print(f"Trace written to {args.profile_trace}")
+
+def build(args, profiler=None):
+    timer = profiler if profiler is not None else NullTimer()
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    basepath = args.basepath
+    build_manifest = manifest_path
+    if args.shard is not None:
+        build_manifest = shard_manifest_path(build_dir, *args.shard)
+        print(f"Building shard {args.shard[0]}/{args.shard[1]}")
+
+    if args.clean:
+        print("Deleting public directory...")
+        with timer.stage("clean"):
+            if os.path.exists(public_dir):
+                shutil.rmtree(public_dir)
+
+    cache = None
+    if not args.no_cache:
+        cache = RenderCache(render_cache_dir)
+        cache.remove_stale_versions()
+
+    if args.shard is None or args.shard[0] == 1:
+        print("Copying static files...")
+        with timer.stage("static"):
+            static_stats = sync_files_recursive(static_dir, public_dir, build_manifest, args.link_static, args.checksum)
+        print(f"{static_stats['copied']} static files copied, {static_stats['unchanged']} unchanged, {static_stats['removed']} removed")
+    print("Generating content...")
+    with timer.stage("content"):
+        stats = generate_content_incremental(content_dir, template_path, public_dir, basepath, build_manifest,
+                                             full=not args.incremental, jobs=jobs, cache=cache, profiler=profiler,
+                                             shard=args.shard)
+    if args.shard is not None:
+        update_manifest(build_manifest, shard={"index": args.shard[0], "count": args.shard[1], **stats})
+    elif not args.incremental:
+        # Other shards' files are untracked here, so only unsharded builds sweep
+        with timer.stage("remove untracked"):
+            stats["removed"] += remove_untracked(public_dir, manifest_path)
+    if cache is not None:
+        with timer.stage("cache prune"):
+            cache.prune()
+    print(f"{stats['generated']} pages generated, {stats['written']} changed on disk, "
+          f"{stats['unchanged']} unchanged, {stats['removed']} removed")
 
+if __name__ == "__main__":
+    main()
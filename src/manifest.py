@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def empty_manifest():
+    return {"pages": {}}
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return empty_manifest()
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except ValueError:
+        print(f"Ignoring unreadable build manifest {path}")
+        return empty_manifest()
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("pages"), dict):
+        return empty_manifest()
+    return manifest
+
+def save_manifest(path, manifest):
+    manifest_dir = os.path.dirname(path)
+    if manifest_dir != "":
+        os.makedirs(manifest_dir, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def update_manifest(path, **sections):
+    manifest = load_manifest(path)
+    manifest.update(sections)
+    save_manifest(path, manifest)
+
+def remove_output(dst_path, dst_dir):
+    print(f" * removing {dst_path}")
+    if os.path.exists(dst_path):
+        os.remove(dst_path)
+    # Drop directories left empty by the removal, but never dst_dir itself
+    root = os.path.abspath(dst_dir)
+    parent = os.path.dirname(os.path.abspath(dst_path))
+    while parent != root and parent.startswith(root) and not os.listdir(parent):
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
+
+def remove_untracked(dst_dir, manifest_path):
+    # Stands in for wiping dst_dir before a full build: anything the
+    # manifest does not list is removed, everything else keeps its mtime
+    manifest = load_manifest(manifest_path)
+    tracked = {os.path.normpath(path) for path in manifest["pages"]}
+    tracked.update(os.path.normpath(path) for path in manifest.get("static", []))
+    removed = 0
+    for dirpath, _, filenames in os.walk(dst_dir):
+        for filename in sorted(filenames):
+            dst_path = os.path.join(dirpath, filename)
+            if os.path.normpath(dst_path) not in tracked:
+                remove_output(dst_path, dst_dir)
+                removed += 1
+    return removed
+
+def page_entry(src_path, template_hash, basepath):
+    # Paths are normalised so "./content/" and "content" give the same
+    # entry, whichever tool wrote the manifest
+    return {
+        "source": os.path.normpath(str(src_path)),
+        "source_hash": hash_file(src_path),
+        "template_hash": template_hash,
+        "basepath": basepath,
+    }
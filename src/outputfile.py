@@ -0,0 +1,74 @@
+import locale
+import os
+
+
+class OutputFile:
+    # Compares what is written against the existing file and only starts a
+    # temp file once they differ, so identical output keeps its mtime and a
+    # real change replaces the file atomically
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.{os.getpid()}.tmp"
+        self.encoding = locale.getpreferredencoding(False)
+        self.tmp = None
+        self.matched = 0
+        self.changed = False
+        try:
+            self.existing = open(path, "rb")
+        except FileNotFoundError:
+            self.existing = None
+
+    def write(self, text):
+        data = text.encode(self.encoding)
+        if self.tmp is None:
+            if self.existing is not None and self.existing.read(len(data)) == data:
+                self.matched += len(data)
+                return
+            self.diverge()
+        self.tmp.write(data)
+
+    def diverge(self):
+        self.tmp = open(self.tmp_path, "wb")
+        if self.existing is None:
+            return
+        # Carry over the prefix that matched before the first difference
+        self.existing.seek(0)
+        remaining = self.matched
+        while remaining > 0:
+            chunk = self.existing.read(min(remaining, 65536))
+            self.tmp.write(chunk)
+            remaining -= len(chunk)
+        self.existing.close()
+        self.existing = None
+
+    def close(self):
+        if self.tmp is None:
+            if self.existing is not None and self.existing.read(1) == b"":
+                self.existing.close()
+                return
+            # The new output is a strict prefix of the old file, or there
+            # was no file at all
+            self.diverge()
+        self.tmp.close()
+        os.replace(self.tmp_path, self.path)
+        self.changed = True
+
+    def discard(self):
+        if self.existing is not None:
+            self.existing.close()
+        if self.tmp is not None:
+            self.tmp.close()
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+        return False
+
+    def __repr__(self):
+        return f"OutputFile({self.path}, changed={self.changed})"
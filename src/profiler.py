@@ -0,0 +1,74 @@
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class NullTimer:
+    def stage(self, name):
+        return nullcontext()
+
+
+class StageTimer:
+    def __init__(self):
+        self.spans = []
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((name, start, time.perf_counter() - start))
+
+
+class BuildProfiler(StageTimer):
+    def __init__(self):
+        super().__init__()
+        self.pages = []
+        self.page_spans = []
+
+    def add_page(self, src_path, spans, pid=None):
+        pid = pid if pid is not None else os.getpid()
+        self.pages.append((str(src_path), sum(duration for _, _, duration in spans)))
+        for name, start, duration in spans:
+            self.page_spans.append((name, start, duration, pid, str(src_path)))
+
+    def stage_totals(self, spans):
+        totals = {}
+        for span in spans:
+            name, duration = span[0], span[2]
+            calls, total = totals.get(name, (0, 0.0))
+            totals[name] = (calls + 1, total + duration)
+        return totals
+
+    def summary(self, top=10):
+        lines = ["Build profile", f"{'stage':<28}{'calls':>8}{'total (s)':>12}"]
+        for name, (calls, total) in self.stage_totals(self.spans).items():
+            lines.append(f"{name:<28}{calls:>8}{total:>12.4f}")
+        for name, (calls, total) in self.stage_totals(self.page_spans).items():
+            lines.append(f"{'  page: ' + name:<28}{calls:>8}{total:>12.4f}")
+        if self.pages:
+            lines.append(f"Slowest {min(top, len(self.pages))} of {len(self.pages)} pages")
+            for src_path, duration in sorted(self.pages, key=lambda page: page[1], reverse=True)[:top]:
+                lines.append(f"{duration * 1000:>10.2f}ms  {src_path}")
+        return "\n".join(lines)
+
+    def trace_events(self):
+        # Chrome trace-event format, loadable in chrome://tracing or Perfetto
+        pid = os.getpid()
+        events = []
+        for name, start, duration in self.spans:
+            events.append({"name": name, "cat": "build", "ph": "X", "pid": pid, "tid": pid,
+                           "ts": start * 1e6, "dur": duration * 1e6})
+        for name, start, duration, page_pid, src_path in self.page_spans:
+            events.append({"name": name, "cat": "page", "ph": "X", "pid": pid, "tid": page_pid,
+                           "ts": start * 1e6, "dur": duration * 1e6, "args": {"source": src_path}})
+        return events
+
+    def write_trace(self, path):
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, f)
+
+    def __repr__(self):
+        return f"BuildProfiler({len(self.spans)} stages, {len(self.pages)} pages)"
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+
+# Everything that decides what a cached entry holds: the parsers, the syntax
+# they share and render_markdown, which defines the entry format
+PARSER_MODULES = ["blockparser.py", "textparser.py", "syntax.py", "textnode.py", "htmlnode.py", "gencontent.py"]
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def parser_version():
+    # Any edit to the parser invalidates every cached render
+    digest = hashlib.sha256()
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in PARSER_MODULES:
+        with open(os.path.join(src_dir, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class RenderCache:
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, version=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = version if version is not None else parser_version()
+        self.entry_dir = os.path.join(cache_dir, self.version)
+
+    def key(self, markdown):
+        return hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.entry_dir, key[:2], key + ".json")
+
+    def get(self, markdown):
+        path = self.path(self.key(markdown))
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # mtime doubles as the last-used time for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, markdown, entry):
+        path = self.path(self.key(markdown))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def remove_stale_versions(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for item in os.listdir(self.cache_dir):
+            if item != self.version:
+                shutil.rmtree(os.path.join(self.cache_dir, item), ignore_errors=True)
+
+    def prune(self):
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.entry_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Pruned by a concurrent build sharing the cache
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def __repr__(self):
+        return f"RenderCache({self.cache_dir}, {self.version}, {self.max_bytes})"
+
+
+class MemoryRenderCache:
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def key(self, markdown):
+        return hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+
+    def get(self, markdown):
+        key = self.key(markdown)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, markdown, entry):
+        key = self.key(markdown)
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def __repr__(self):
+        return f"MemoryRenderCache({len(self.entries)}/{self.max_entries})"
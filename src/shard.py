@@ -0,0 +1,73 @@
+import argparse
+import hashlib
+import os
+from pathlib import Path
+from manifest import empty_manifest, load_manifest, save_manifest
+
+
+def parse_shard(spec):
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{spec}: shard must look like K/N, e.g. 3/8")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"{spec}: shard K/N needs 1 <= K <= N")
+    return index, count
+
+def parse_shard_count(spec):
+    try:
+        count = int(spec)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{spec}: shard count must be a whole number")
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"{spec}: shard count must be at least 1")
+    return count
+
+def shard_of(rel_path, count):
+    # Hash the path relative to the content directory so every machine
+    # assigns a page to the same shard whatever its checkout location
+    digest = hashlib.sha256(Path(rel_path).as_posix().encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+def in_shard(src_path, src_dir, shard):
+    if shard is None:
+        return True
+    index, count = shard
+    return shard_of(os.path.relpath(src_path, src_dir), count) == index
+
+def shard_manifest_path(build_dir, index, count):
+    return os.path.join(build_dir, f"manifest-shard-{index}-of-{count}.json")
+
+def merge_shard_manifests(build_dir, count, manifest_path):
+    # An empty range would overwrite the manifest with an empty one
+    if count < 1:
+        raise ValueError(f"Cannot merge {count} shards, need at least 1")
+    merged = empty_manifest()
+    merged["static"] = []
+    merged["graph"] = {}
+    owners = {}
+    conflicts = []
+    totals = {"shards": count, "pages": 0, "static": 0, "generated": 0, "written": 0}
+    for index in range(1, count + 1):
+        path = shard_manifest_path(build_dir, index, count)
+        if not os.path.exists(path):
+            raise Exception(f"Missing manifest for shard {index}/{count}: {path}")
+        manifest = load_manifest(path)
+        outputs = list(manifest["pages"]) + manifest.get("static", [])
+        for output in outputs:
+            output = os.path.normpath(output)
+            if output in owners:
+                conflicts.append(f"{output} (shards {owners[output]} and {index})")
+            owners[output] = index
+        merged["pages"].update(manifest["pages"])
+        merged["static"].extend(manifest.get("static", []))
+        merged["graph"].update(manifest.get("graph", {}))
+        stats = manifest.get("shard", {})
+        totals["pages"] += len(manifest["pages"])
+        totals["static"] += len(manifest.get("static", []))
+        totals["generated"] += stats.get("generated", 0)
+        totals["written"] += stats.get("written", 0)
+    if conflicts:
+        raise Exception(f"{len(conflicts)} outputs written by more than one shard: " + ", ".join(conflicts))
+    save_manifest(manifest_path, merged)
+    return totals
@@ -0,0 +1,29 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+
+class SiteTestCase(unittest.TestCase):
+    # Gives each test a fresh temporary directory to lay a site out in, and
+    # runs builds without their progress output
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def quietly(self, func, *args, **kwargs):
+        with redirect_stdout(io.StringIO()):
+            return func(*args, **kwargs)
@@ -0,0 +1,53 @@
+import codecs
+import locale
+import mmap
+import os
+
+# Sources at least this large are mapped rather than read through a text file
+MMAP_THRESHOLD = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+def read_source(path, mmap_threshold=MMAP_THRESHOLD):
+    # Same text as open(path, "r").read(); large sources are decoded
+    # straight from the mapping instead of being read into a buffer first
+    size = os.path.getsize(path)
+    if size == 0 or size < mmap_threshold:
+        with open(path, "r") as f:
+            return f.read()
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = codecs.decode(mm, locale.getpreferredencoding(False))
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+def iter_source_lines(path, mmap_threshold=MMAP_THRESHOLD, chunk_size=CHUNK_SIZE):
+    # Yields lines without their newline, with the same newline translation
+    # and encoding as open(path, "r")
+    size = os.path.getsize(path)
+    # Empty files cannot be mapped
+    if size == 0 or size < mmap_threshold:
+        with open(path, "r") as f:
+            for line in f:
+                yield line.rstrip("\n")
+        return
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from iter_mapped_lines(mm, locale.getpreferredencoding(False), chunk_size)
+
+def iter_mapped_lines(mm, encoding, chunk_size=CHUNK_SIZE):
+    # Only one chunk of whole lines is decoded at a time; splitting on b"\n"
+    # never cuts a character in an ASCII-compatible encoding
+    size = len(mm)
+    start = 0
+    while start < size:
+        end = mm.find(b"\n", min(start + chunk_size, size) - 1)
+        end = size if end == -1 else end + 1
+        text = mm[start:end].decode(encoding)
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        if text.endswith("\n"):
+            text = text[:-1]
+        yield from text.split("\n")
+        start = end
@@ -0,0 +1,29 @@
+import re
+
+# Inline syntax. Delimiters and the text type they mark are listed in
+# precedence order: a span may not contain a delimiter that comes before
+# its own
+INLINE_DELIMITERS = (("**", "bold"), ("_", "italic"), ("`", "code"))
+IMAGE_OPEN = "!["
+LINK_OPEN = "["
+INLINE_TOKEN_PATTERN = re.compile("|".join([re.escape(delimiter) for delimiter, _ in INLINE_DELIMITERS]) + r"|!?\[")
+# A text without any of these characters has no inline markup at all
+INLINE_MARKUP_PATTERN = re.compile("[" + re.escape("".join([delimiter[0] for delimiter, _ in INLINE_DELIMITERS]) + LINK_OPEN) + "]")
+# Between a link's text and its url, and the end of the url
+LINK_MIDDLE = "]("
+LINK_CLOSE = ")"
+# Same matches as the lazy \[(.*?)\]\((.*?)\), but the text stops at the
+# first "](" and the url at the first ")", so a miss cannot backtrack into
+# later brackets
+SPAN_BODY = r"([^\]\n]*(?:\](?!\()[^\]\n]*)*)\]\(([^)\n]*)\)"
+IMAGE_SPAN_PATTERN = re.compile(r"!\[" + SPAN_BODY)
+LINK_SPAN_PATTERN = re.compile(r"\[" + SPAN_BODY)
+
+# Block syntax, dispatched on the first character of a block
+HEADING_PREFIXES = ("# ", "## ", "### ", "#### ", "##### ", "###### ")
+CODE_FENCE = "```"
+QUOTE_PREFIX = ">"
+ULIST_PREFIX = "- "
+# Items are compared on their first three characters, so an ordered list
+# can only have nine items
+OLIST_PREFIXES = [f"{number}. " for number in range(1, 10)]
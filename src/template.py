@@ -0,0 +1,61 @@
+import re
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{ (Title|Content) \}\}")
+ROOT_URL_PATTERN = re.compile(r'(href|src)="/')
+
+
+def rewrite_root_urls(html, basepath):
+    # With the default basepath every rewrite is a no-op, so skip the scan
+    if basepath == "/":
+        return html
+    return ROOT_URL_PATTERN.sub(lambda match: f'{match.group(1)}="{basepath}', html)
+
+
+class Template:
+    def __init__(self, text, basepath="/", path=None):
+        self.basepath = basepath
+        self.path = path
+        self.segments = []
+        self.slots = []
+        start = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            self.segments.append(rewrite_root_urls(text[start:match.start()], basepath))
+            self.slots.append(match.group(1))
+            start = match.end()
+        self.segments.append(rewrite_root_urls(text[start:], basepath))
+
+    def render(self, title, content):
+        values = {
+            "Title": rewrite_root_urls(title, self.basepath),
+            "Content": rewrite_root_urls(content, self.basepath),
+        }
+        parts = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            parts.append(values[slot])
+            parts.append(segment)
+        return "".join(parts)
+
+    def write(self, write, title, content):
+        if self.basepath == "/":
+            write_content = write
+        else:
+            def write_content(fragment):
+                write(rewrite_root_urls(fragment, self.basepath))
+        title = rewrite_root_urls(title, self.basepath)
+        write(self.segments[0])
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            if slot == "Title":
+                write(title)
+            elif isinstance(content, str):
+                write_content(content)
+            else:
+                content.write_html(write_content)
+            write(segment)
+
+    def __repr__(self):
+        return f"Template({self.path}, {self.basepath}, {self.slots})"
+
+
+def load_template(template_path, basepath="/"):
+    with open(template_path, "r") as f:
+        return Template(f.read(), basepath, template_path)
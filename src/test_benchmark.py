@@ -0,0 +1,53 @@
+import os
+import random
+import tempfile
+import unittest
+from benchmark import run_benchmarks
+from blockparser import parse_markdown
+from corpus import generate_corpus, synthetic_page
+from manifest import load_manifest
+
+class TestCorpus(unittest.TestCase):
+    def test_pages_are_deterministic(self):
+        self.assertEqual(synthetic_page(random.Random(3)), synthetic_page(random.Random(3)))
+        self.assertNotEqual(synthetic_page(random.Random(3)), synthetic_page(random.Random(4)))
+
+    def test_pages_parse(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            document = parse_markdown(synthetic_page(rng))
+            self.assertIsNotNone(document.title)
+
+    def test_plain_pages_have_no_inline_markup(self):
+        page = synthetic_page(random.Random(0), blocks=30, mix={"paragraph": 1}, markup=False)
+        for char in "*_`[":
+            self.assertNotIn(char, page)
+
+    def test_generate_corpus(self):
+        with tempfile.TemporaryDirectory() as root:
+            content_dir, static_dir, template_path = generate_corpus(root, pages=5, static_files=2, static_size=16)
+            pages = [os.path.join(dirpath, name) for dirpath, _, names in os.walk(content_dir) for name in names]
+            self.assertEqual(5, len(pages))
+            self.assertEqual(["image0000.png", "image0001.png"], sorted(os.listdir(os.path.join(static_dir, "images"))))
+            self.assertTrue(os.path.isfile(template_path))
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_run_benchmarks(self):
+        with tempfile.TemporaryDirectory() as root:
+            generate_corpus(root, pages=3, blocks=5, static_files=1, static_size=16)
+            results = run_benchmarks(root, repeat=1)
+            # end_to_end runs main.py's build, manifest and all
+            self.assertEqual(3, len(load_manifest(os.path.join(root, ".build", "manifest.json"))["pages"]))
+            self.assertTrue(os.path.isfile(os.path.join(root, "docs", "index.css")))
+        self.assertEqual(
+            ["markdown_to_blocks", "block_to_block_type", "text_to_textnodes", "texts_to_textnodes",
+             "markdown_to_html_node", "to_html", "lazy_render", "template_fill", "static_copy", "end_to_end"],
+            list(results),
+        )
+        self.assertEqual(3, results["end_to_end"]["items"])
+        self.assertGreater(results["text_to_textnodes"]["items"], 0)
+        self.assertEqual(results["text_to_textnodes"]["items"], results["texts_to_textnodes"]["items"])
+
+if __name__ == "__main__":
+    unittest.main()
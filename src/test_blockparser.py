@@ -1,6 +1,11 @@
 import unittest
 
-from blockparser import BlockType, block_to_block_type, markdown_to_blocks, markdown_to_html_node
+from blockparser import (
+    BlockStream, BlockType, block_to_block_type, block_to_html_node, code_to_html_node, heading_to_html_node, markdown_to_blocks,
+    markdown_to_html_node, olist_to_html_node, paragraph_to_html_node, parse_markdown, parse_markdown_lazy, quote_to_html_node,
+    scan_blocks, ulist_to_html_node,
+)
+from htmlnode import LeafNode, ParentNode
 
 class TestBlockParser(unittest.TestCase):
     # Block splitting tests
@@ -63,6 +68,24 @@ class TestBlockParser(unittest.TestCase):
         ]
         self.assertListEqual(expected, blocks)
 
+    def test_windows_newlines(self):
+        markdown = "# Heading\r\n\r\n- one\r\n- two\r\n"
+        self.assertListEqual(["# Heading", "- one\n- two"], markdown_to_blocks(markdown))
+
+    def test_whitespace_only_lines_are_dropped(self):
+        markdown = "# Heading\n\n   \n\t\n\nparagraph"
+        self.assertListEqual(["# Heading", "paragraph"], markdown_to_blocks(markdown))
+        self.assertEqual("<div><h1>Heading</h1><p>paragraph</p></div>", markdown_to_html_node(markdown).to_html())
+
+    def test_scan_blocks_line_spans(self):
+        markdown = "# Heading\n\n\n\n  \n- one\n- two  \n\n```\ncode\n```\n"
+        blocks = scan_blocks(markdown)
+        self.assertEqual(
+            [(BlockType.HEADING, 0, 1), (BlockType.ULIST, 5, 7), (BlockType.CODE, 8, 11)],
+            [(block.block_type, block.start, block.end) for block in blocks],
+        )
+        self.assertListEqual(["- one", "- two"], blocks[1].lines)
+
     # Block type tests
 
     def test_headings(self):
@@ -332,3 +355,107 @@ class TestBlockParser(unittest.TestCase):
         expected += "</div>"
         self.assertEqual(expected, html)
 
+    # Parsed document tests
+
+    def test_parse_markdown_metadata(self):
+        md = "## Intro\n\n"
+        md += "Some words in a paragraph\n\n"
+        md += "# The **real** title\n\n"
+        md += "- one item\n- two items\n\n"
+        md += "# A second h1"
+        document = parse_markdown(md)
+        self.assertEqual("The real title", document.title)
+        self.assertEqual([(2, "Intro"), (1, "The real title"), (1, "A second h1")], document.headings)
+        self.assertEqual(16, document.word_count)
+        self.assertEqual(markdown_to_html_node(md).to_html(), document.node.to_html())
+
+    def test_parse_markdown_without_title(self):
+        document = parse_markdown("Just a paragraph")
+        self.assertIsNone(document.title)
+        self.assertEqual([], document.headings)
+        self.assertEqual(3, document.word_count)
+
+    def test_plain_blocks_render_as_leaves(self):
+        md = "## Plain heading\n\nJust some prose\n\n> plain quote\n\n- one\n- two **bold**"
+        node = markdown_to_html_node(md)
+        heading, paragraph, quote, ulist = node.children
+        self.assertIsInstance(heading, LeafNode)
+        self.assertIsInstance(paragraph, LeafNode)
+        self.assertIsInstance(quote, LeafNode)
+        self.assertIsInstance(ulist.children[0], LeafNode)
+        self.assertIsInstance(ulist.children[1], ParentNode)
+        expected = "<div><h2>Plain heading</h2><p>Just some prose</p><blockquote>plain quote</blockquote><ul><li>one</li><li>two <b>bold</b></li></ul></div>"
+        self.assertEqual(expected, node.to_html())
+
+    def test_unmatched_markup_renders_as_leaf(self):
+        node = markdown_to_html_node("a [bracket that never closes")
+        self.assertIsInstance(node.children[0], LeafNode)
+        self.assertEqual("<div><p>a [bracket that never closes</p></div>", node.to_html())
+
+    def test_heading_without_text_still_fails(self):
+        with self.assertRaises(ValueError):
+            markdown_to_html_node("# ``").to_html()
+
+    def test_lazy_document_renders_without_tree(self):
+        md = "# The **title**\n\nSome [link](/a) and ![img](/b.png)\n\n- one\n- _two_\n\n```\ncode\n```"
+        document = parse_markdown_lazy(md)
+        self.assertEqual(parse_markdown(md).node.to_html(), document.to_html())
+        self.assertEqual(["/b.png"], document.images)
+        self.assertEqual(["/a"], document.links)
+        self.assertEqual("The title", document.title)
+        self.assertIsNone(document.tree)
+
+    def test_lazy_document_builds_tree_when_walked(self):
+        md = "## Intro\n\nSome words here\n\n# The **real** title\n\n- one item\n- two items"
+        document = parse_markdown_lazy(md)
+        eager = parse_markdown(md)
+        self.assertEqual(eager.headings, document.headings)
+        self.assertEqual(eager.word_count, document.word_count)
+        self.assertIsNotNone(document.tree)
+        self.assertEqual(eager.node.to_html(), document.node.to_html())
+
+    def test_direct_rendering_matches_node_tree(self):
+        # Every block type and text type, plain and marked-up blocks, and
+        # markup that never closes
+        inline = "**bold** _italic_ `code` [link](/a) ![img](/b.png) plain"
+        samples = [
+            f"# Title {inline}", "###### Plain heading", f"A paragraph with {inline}\nover two lines", "Plain prose",
+            "```\ncode with **stars**\n```", f"> quote {inline}\n> more", "> plain quote",
+            f"- {inline}\n- plain item", f"1. {inline}\n2. plain item", "a [bracket that never closes", "a ![bang [bracket",
+            "not [a link] (/x)", "This is **unclosed", "- item with _unclosed", "1. `unclosed", "> quote **unclosed",
+        ]
+        for md in samples:
+            with self.subTest(md=md):
+                try:
+                    expected = markdown_to_html_node(md).to_html()
+                except ValueError:
+                    with self.assertRaises(ValueError):
+                        parse_markdown_lazy(md).to_html()
+                    parts = []
+                    with self.assertRaises(ValueError):
+                        BlockStream(list(scan_blocks(md))).write_html(parts.append)
+                    continue
+                self.assertEqual(expected, parse_markdown_lazy(md).to_html())
+                parts = []
+                BlockStream(list(scan_blocks(md))).write_html(parts.append)
+                self.assertEqual(expected, "".join(parts))
+
+    def test_block_string_functions(self):
+        self.assertEqual("<p>abc def</p>", paragraph_to_html_node("abc\ndef").to_html())
+        self.assertEqual("<h2>Two <i>it</i></h2>", heading_to_html_node("## Two _it_").to_html())
+        self.assertEqual("<pre><code>x = 1</code></pre>", code_to_html_node("```\nx = 1\n```").to_html())
+        self.assertEqual("<blockquote>a b</blockquote>", quote_to_html_node("> a\n> b").to_html())
+        self.assertEqual("<ul><li>a</li><li><b>b</b></li></ul>", ulist_to_html_node("- a\n- **b**").to_html())
+        self.assertEqual("<ol><li>a</li><li>b</li></ol>", olist_to_html_node("1. a\n2. b").to_html())
+        for block in markdown_to_blocks("# T\n\ntext\n\n> q\n\n- a\n\n1. b\n\n```\nc\n```"):
+            self.assertEqual(markdown_to_html_node(block).to_html(), f"<div>{block_to_html_node(block).to_html()}</div>")
+
+    def test_lazy_title_only_renders_first_h1(self):
+        document = parse_markdown_lazy("# Title\n\nThis is **unclosed")
+        self.assertEqual("Title", document.title)
+        with self.assertRaises(ValueError):
+            document.to_html()
+
+    def test_lazy_empty_document(self):
+        with self.assertRaises(ValueError):
+            parse_markdown_lazy("").to_html()
@@ -0,0 +1,71 @@
+import os
+import unittest
+from copystatic import copy_file_contents, copy_files_recursive, sync_files_recursive
+from sitefixture import SiteTestCase
+
+class TestStaticSync(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "docs")
+        self.manifest = os.path.join(self.root, ".build", "manifest.json")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+        self.write(os.path.join(self.public, "index.html"), "<html></html>")
+
+    def sync(self, link_mode="copy", checksum=False):
+        return self.quietly(sync_files_recursive, self.static, self.public, self.manifest, link_mode, checksum)
+
+    def test_second_sync_copies_nothing(self):
+        self.assertEqual({"copied": 2, "unchanged": 0, "removed": 0}, self.sync())
+        self.assertEqual({"copied": 0, "unchanged": 2, "removed": 0}, self.sync())
+
+    def test_changed_file_copied(self):
+        self.sync()
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.assertEqual({"copied": 1, "unchanged": 1, "removed": 0}, self.sync())
+        self.assertEqual("body { margin: 0 }", self.read(os.path.join(self.public, "index.css")))
+
+    def test_stale_files_removed_but_pages_kept(self):
+        self.sync()
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        self.assertEqual({"copied": 0, "unchanged": 1, "removed": 1}, self.sync())
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_checksum_skips_touched_file(self):
+        self.sync()
+        os.utime(os.path.join(self.static, "index.css"), (0, 0))
+        self.assertEqual({"copied": 0, "unchanged": 2, "removed": 0}, self.sync(checksum=True))
+        self.assertEqual({"copied": 0, "unchanged": 2, "removed": 0}, self.sync())
+
+    def test_hardlink_mode(self):
+        self.sync(link_mode="hardlink")
+        src_stat = os.stat(os.path.join(self.static, "index.css"))
+        dst_stat = os.stat(os.path.join(self.public, "index.css"))
+        self.assertEqual(src_stat.st_ino, dst_stat.st_ino)
+        self.assertEqual({"copied": 0, "unchanged": 2, "removed": 0}, self.sync(link_mode="hardlink"))
+
+    def test_reflink_mode_falls_back_to_copy(self):
+        self.sync(link_mode="reflink")
+        self.assertEqual("png", self.read(os.path.join(self.public, "images", "a.png")))
+
+    def test_parallel_full_copy(self):
+        for i in range(20):
+            self.write(os.path.join(self.static, "images", f"{i}.png"), f"image {i}")
+        self.quietly(copy_files_recursive, self.static, self.public, workers=4)
+        for i in range(20):
+            self.assertEqual(f"image {i}", self.read(os.path.join(self.public, "images", f"{i}.png")))
+
+    def test_copy_file_contents(self):
+        src = os.path.join(self.root, "big.bin")
+        dst = os.path.join(self.root, "copy.bin")
+        data = os.urandom(3 * 1024 * 1024 + 7)
+        with open(src, "wb") as f:
+            f.write(data)
+        copy_file_contents(src, dst)
+        with open(dst, "rb") as f:
+            self.assertEqual(data, f.read())
+
+if __name__ == "__main__":
+    unittest.main()
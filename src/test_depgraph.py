@@ -0,0 +1,62 @@
+import os
+import unittest
+from depgraph import DependencyGraph, load_graph
+from gencontent import generate_content_incremental
+from sitefixture import SiteTestCase
+
+class TestDependencyGraph(unittest.TestCase):
+    def setUp(self):
+        self.graph = DependencyGraph()
+        self.graph.add_page("docs/index.html", "content/index.md", "template.html", ["/images/a.png"], ["/blog/tom"])
+        self.graph.add_page("docs/blog/tom/index.html", "./content/blog/tom/index.md", "./template.html",
+                            ["/images/a.png", "/images/b.png", "/images/a.png"])
+
+    def test_queries(self):
+        self.assertEqual(["docs/index.html"], self.graph.outputs_for_source("./content/index.md"))
+        self.assertEqual(["docs/blog/tom/index.html", "docs/index.html"], self.graph.outputs_for_template("template.html"))
+        self.assertEqual(["docs/blog/tom/index.html", "docs/index.html"], self.graph.pages_referencing("/images/a.png"))
+        self.assertEqual(["docs/index.html"], self.graph.pages_referencing("/blog/tom"))
+        self.assertEqual(["/images/a.png", "/images/b.png"], self.graph.dependencies("docs/blog/tom/index.html")["images"])
+
+    def test_affected_outputs(self):
+        self.assertEqual(["docs/blog/tom/index.html"], self.graph.affected_outputs({"content/blog/tom/index.md"}))
+        self.assertEqual(2, len(self.graph.affected_outputs({"template.html"})))
+        self.assertEqual([], self.graph.affected_outputs({"static/images/a.png"}))
+
+    def test_readd_and_remove_update_indexes(self):
+        self.graph.add_page("docs/index.html", "content/index.md", "template.html", [], [])
+        self.assertEqual(["docs/blog/tom/index.html"], self.graph.pages_referencing("/images/a.png"))
+        self.assertEqual([], self.graph.pages_referencing("/blog/tom"))
+        self.graph.remove("docs/blog/tom/index.html")
+        self.assertEqual([], self.graph.pages_referencing("/images/a.png"))
+        self.assertEqual(["content/index.md"], self.graph.sources())
+
+    def test_round_trip(self):
+        copy = DependencyGraph.from_dict(self.graph.to_dict())
+        self.assertEqual(self.graph.to_dict(), copy.to_dict())
+        self.assertEqual(self.graph.by_reference, copy.by_reference)
+
+
+class TestRecordedGraph(SiteTestCase):
+    def test_build_records_graph(self):
+        content = os.path.join(self.root, "content")
+        template = os.path.join(self.root, "template.html")
+        manifest = os.path.join(self.root, ".build", "manifest.json")
+        public = os.path.join(self.root, "docs")
+        self.write(template, "{{ Title }}{{ Content }}")
+        self.write(os.path.join(content, "index.md"),
+                   "# Home\n\n![logo](/images/logo.png) and [a post](/blog)\n\n```\n[not a link](/code)\n```")
+        self.write(os.path.join(content, "blog", "index.md"), "# Blog")
+        self.quietly(generate_content_incremental, content, template, public, "/", manifest)
+        graph = load_graph(manifest)
+        index = os.path.join(public, "index.html")
+        self.assertEqual(
+            {"source": os.path.join(content, "index.md"), "template": template,
+             "images": ["/images/logo.png"], "links": ["/blog"]},
+            graph.dependencies(index),
+        )
+        self.assertEqual(2, len(graph.outputs_for_template(template)))
+        self.assertEqual([index], graph.affected_outputs({os.path.join(content, "index.md")}))
+
+if __name__ == "__main__":
+    unittest.main()
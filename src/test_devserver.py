@@ -0,0 +1,85 @@
+import asyncio
+import os
+import unittest
+from devserver import LIVE_RELOAD_SCRIPT, DevServer, DevSite
+from sitefixture import SiteTestCase
+
+class TestDevServer(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.site = DevSite(self.content, self.static, self.template)
+
+    def fetch(self, path, headers=None):
+        async def run():
+            server = await asyncio.start_server(DevServer(self.site).handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                request = f"GET {path} HTTP/1.1\r\nHost: localhost\r\n"
+                for name, value in (headers or {}).items():
+                    request += f"{name}: {value}\r\n"
+                writer.write((request + "\r\n").encode("latin-1"))
+                await writer.drain()
+                response = await reader.read()
+                writer.close()
+                return response
+        response = self.quietly(asyncio.run, run())
+        head, _, body = response.partition(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        response_headers = dict(line.split(": ", 1) for line in lines[1:])
+        return status, response_headers, body.decode("utf-8")
+
+    def test_renders_page_from_content(self):
+        status, headers, body = self.fetch("/blog/post/")
+        self.assertEqual(200, status)
+        self.assertIn("<title>Post</title>", body)
+        self.assertIn(LIVE_RELOAD_SCRIPT, body)
+        self.assertIn("Server-Timing", headers)
+        self.assertEqual(200, self.fetch("/blog/post")[0])
+        self.assertEqual(200, self.fetch("/")[0])
+
+    def test_page_etag(self):
+        _, headers, _ = self.fetch("/")
+        status, _, body = self.fetch("/", {"If-None-Match": headers["ETag"]})
+        self.assertEqual(304, status)
+        self.assertEqual("", body)
+
+    def test_static_etag_and_last_modified(self):
+        status, headers, body = self.fetch("/index.css")
+        self.assertEqual((200, "body {}", "text/css"), (status, body, headers["Content-Type"]))
+        self.assertEqual(304, self.fetch("/index.css", {"If-None-Match": headers["ETag"]})[0])
+        self.assertEqual(304, self.fetch("/index.css", {"If-Modified-Since": headers["Last-Modified"]})[0])
+
+    def test_not_found(self):
+        self.assertEqual(404, self.fetch("/missing")[0])
+        self.assertEqual(404, self.fetch("/../template.html")[0])
+
+    def test_invalidate_rerenders_changed_page(self):
+        self.fetch("/")
+        src = os.path.normpath(os.path.join(self.content, "index.md"))
+        self.write(src, "# Changed")
+        self.site.invalidate({src})
+        self.assertIn("<title>Changed</title>", self.fetch("/")[2])
+
+    def test_invalidate_picks_up_new_page(self):
+        src = os.path.normpath(os.path.join(self.content, "new.md"))
+        self.write(src, "# New")
+        self.site.invalidate({src})
+        self.assertEqual(200, self.fetch("/new.html")[0])
+
+    def test_broken_page_is_server_error(self):
+        self.write(os.path.join(self.content, "index.md"), "no heading")
+        status, _, body = self.fetch("/")
+        self.assertEqual(500, status)
+        self.assertIn("no h1 heading", body)
+
+if __name__ == "__main__":
+    unittest.main()
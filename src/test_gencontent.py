@@ -1,5 +1,15 @@
+import io
+import os
+import random
 import unittest
-from gencontent import extract_heading
+from contextlib import redirect_stdout
+from unittest import mock
+import gencontent
+from corpus import synthetic_page
+from depgraph import DependencyGraph
+from gencontent import extract_heading, generate_content_incremental, generate_content_recursive, generate_page, stream_page
+from sitefixture import SiteTestCase
+from template import Template
 
 class TestExtractTitle(unittest.TestCase):
     def test_extract_heading_only(self):
@@ -37,3 +47,159 @@ class TestExtractTitle(unittest.TestCase):
         heading = extract_heading(md)
         expected = "This is a heading"
         self.assertEqual(expected, heading)
+
+
+class TestIncrementalBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.public = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest = os.path.join(self.root, ".build", "manifest.json")
+        self.write(self.template, "<title>{{ Title }}</title><a href=\"/x\"></a>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post")
+
+    def build(self, basepath="/", full=False):
+        return self.quietly(generate_content_incremental, self.content, self.template, self.public, basepath, self.manifest, full)
+
+    def test_second_build_is_noop(self):
+        self.assertEqual({"generated": 2, "written": 2, "unchanged": 0, "removed": 0}, self.build())
+        self.assertEqual({"generated": 0, "written": 0, "unchanged": 2, "removed": 0}, self.build())
+
+    def test_only_changed_page_regenerated(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# New home")
+        self.assertEqual({"generated": 1, "written": 1, "unchanged": 1, "removed": 0}, self.build())
+        self.assertIn("<h1>New home</h1>", self.read(os.path.join(self.public, "index.html")))
+
+    def test_missing_output_regenerated(self):
+        self.build()
+        os.remove(os.path.join(self.public, "index.html"))
+        self.assertEqual({"generated": 1, "written": 1, "unchanged": 1, "removed": 0}, self.build())
+
+    def test_removed_source_deletes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self.assertEqual({"generated": 0, "written": 0, "unchanged": 1, "removed": 1}, self.build())
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_template_or_basepath_change_rebuilds_all(self):
+        self.build()
+        self.write(self.template, "{{ Title }}|{{ Content }}")
+        self.assertEqual({"generated": 2, "written": 2, "unchanged": 0, "removed": 0}, self.build())
+        self.assertEqual({"generated": 2, "written": 0, "unchanged": 0, "removed": 0}, self.build(basepath="/site/"))
+
+    def test_changed_inputs_map_through_graph(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# New home")
+        with mock.patch.object(DependencyGraph, "affected_outputs", autospec=True,
+                               side_effect=DependencyGraph.affected_outputs) as affected_outputs:
+            self.assertEqual({"generated": 1, "written": 1, "unchanged": 1, "removed": 0}, self.build())
+            self.write(self.template, "{{ Title }}|{{ Content }}")
+            self.assertEqual({"generated": 2, "written": 2, "unchanged": 0, "removed": 0}, self.build())
+        self.assertEqual({os.path.join(self.content, "index.md")}, affected_outputs.call_args_list[0].args[1])
+        self.assertEqual({self.template}, affected_outputs.call_args_list[1].args[1])
+
+    def test_full_build_ignores_manifest(self):
+        self.build()
+        self.assertEqual({"generated": 2, "written": 0, "unchanged": 0, "removed": 0}, self.build(full=True))
+
+    def test_identical_output_keeps_mtime(self):
+        self.build()
+        dst = os.path.join(self.public, "index.html")
+        os.utime(dst, ns=(0, 0))
+        self.build(full=True)
+        self.assertEqual(0, os.stat(dst).st_mtime_ns)
+
+    def test_full_build_removes_deleted_source_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "index.md"))
+        self.assertEqual({"generated": 1, "written": 0, "unchanged": 0, "removed": 1}, self.build(full=True))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html")))
+
+
+class TestParallelBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(6):
+            self.write(os.path.join(self.content, f"page{i}", "index.md"), f"# Page {i}\n\nSome **text** for page {i}")
+
+    def build(self, dst_dir, jobs):
+        log = io.StringIO()
+        with redirect_stdout(log):
+            generate_content_recursive(self.content, self.template, dst_dir, "/", jobs)
+        return log.getvalue()
+
+    def test_parallel_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        parallel = os.path.join(self.root, "parallel")
+        serial_log = self.build(serial, 1)
+        parallel_log = self.build(parallel, 3)
+        self.assertEqual(serial_log.replace(serial, parallel), parallel_log)
+        for i in range(6):
+            expected = self.read(os.path.join(serial, f"page{i}", "index.html"))
+            self.assertEqual(expected, self.read(os.path.join(parallel, f"page{i}", "index.html")))
+
+    def test_parallel_failure_names_source(self):
+        bad = os.path.join(self.content, "page3", "index.md")
+        self.write(bad, "no heading here")
+        with self.assertRaises(Exception) as cm:
+            self.build(os.path.join(self.root, "out"), 3)
+        self.assertIn(bad, str(cm.exception))
+
+    def test_failure_keeps_parser_error_as_cause(self):
+        bad = os.path.join(self.content, "page3", "index.md")
+        self.write(bad, "# Page\n\nThis is **unclosed")
+        with self.assertRaises(Exception) as cm:
+            self.build(os.path.join(self.root, "out"), 1)
+        self.assertIsInstance(cm.exception.__cause__, ValueError)
+
+    def test_failure_cancels_pending_pages(self):
+        shutdowns = []
+
+        class Executor:
+            def __init__(self, max_workers):
+                pass
+
+            def map(self, func, pages, chunksize=1):
+                return map(func, pages)
+
+            def shutdown(self, cancel_futures=False):
+                shutdowns.append(cancel_futures)
+
+        self.write(os.path.join(self.content, "page0", "index.md"), "no heading here")
+        with mock.patch.object(gencontent, "ProcessPoolExecutor", Executor):
+            with self.assertRaises(Exception):
+                self.build(os.path.join(self.root, "out"), 3)
+            self.write(os.path.join(self.content, "page0", "index.md"), "# Page 0")
+            self.build(os.path.join(self.root, "out"), 3)
+        self.assertEqual([True, False], shutdowns)
+
+
+class TestStreamPage(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = Template('<title>{{ Title }}</title><a href="/x"></a>{{ Content }}', "/site/")
+
+    def test_stream_matches_whole_page(self):
+        src = os.path.join(self.root, "big.md")
+        rng = random.Random(5)
+        self.write(src, "## Preface\n\n\n" + synthetic_page(rng, blocks=200) + "\n\n" + synthetic_page(rng, blocks=50))
+        whole = os.path.join(self.root, "whole", "index.html")
+        streamed = os.path.join(self.root, "streamed", "index.html")
+        self.quietly(generate_page, src, None, whole, "/site/", self.template)
+        stream_page(src, streamed, self.template)
+        self.assertEqual(self.read(whole), self.read(streamed))
+
+    def test_stream_without_title_writes_nothing(self):
+        src = os.path.join(self.root, "notitle.md")
+        self.write(src, "## Only a subheading\n\nand a paragraph")
+        dst = os.path.join(self.root, "out", "index.html")
+        with self.assertRaises(Exception):
+            stream_page(src, dst, self.template)
+        self.assertFalse(os.path.exists(dst))
@@ -1,3 +1,5 @@
+import io
+import pickle
 import unittest
 from htmlnode import HTMLNode, LeafNode, ParentNode
 
@@ -98,5 +100,39 @@ class TestHTMLNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             parent_node.to_html()
 
+    # Streaming serializer tests
+
+    def test_write_html_fragments(self):
+        child_node = ParentNode(tag="span", children=[LeafNode(tag="b", value="bold"), LeafNode(tag=None, value="text")])
+        parent_node = ParentNode(tag="div", children=[child_node], props={"class": "x"})
+        fragments = []
+        parent_node.write_html(fragments.append)
+        self.assertEqual(['<div class="x">', "<span>", "<b>bold</b>", "text", "</span>", "</div>"], fragments)
+        self.assertEqual("".join(fragments), parent_node.to_html())
+
+    def test_write_html_to_file(self):
+        parent_node = ParentNode(tag="p", children=[LeafNode(tag="i", value="streamed")])
+        out = io.StringIO()
+        parent_node.write_html(out.write)
+        self.assertEqual("<p><i>streamed</i></p>", out.getvalue())
+
+    def test_html_node_to_html_not_implemented(self):
+        with self.assertRaises(NotImplementedError):
+            HTMLNode(tag="p", value="x").to_html()
+
+    # Compact layout tests
+
+    def test_nodes_have_no_instance_dict(self):
+        for node in (HTMLNode("p"), LeafNode(tag="b", value="x"), ParentNode(tag="p", children=[])):
+            self.assertFalse(hasattr(node, "__dict__"))
+            with self.assertRaises(AttributeError):
+                node.extra = True
+
+    def test_nodes_pickle(self):
+        parent_node = ParentNode(tag="p", children=[LeafNode(tag="a", value="link", props={"href": "/"})])
+        copy = pickle.loads(pickle.dumps(parent_node))
+        self.assertEqual(parent_node.to_html(), copy.to_html())
+        self.assertEqual(repr(parent_node), repr(copy))
+
 if __name__ == "__main__":
     unittest.main()
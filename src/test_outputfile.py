@@ -0,0 +1,53 @@
+import os
+import unittest
+from manifest import remove_untracked, save_manifest
+from outputfile import OutputFile
+from sitefixture import SiteTestCase
+
+class TestOutputFile(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.root, "index.html")
+
+    def write_output(self, *fragments):
+        with OutputFile(self.path) as f:
+            for fragment in fragments:
+                f.write(fragment)
+        return f.changed
+
+    def test_new_file(self):
+        self.assertTrue(self.write_output("<p>", "new", "</p>"))
+        self.assertEqual("<p>new</p>", self.read(self.path))
+
+    def test_identical_output_is_not_rewritten(self):
+        self.write_output("<p>same</p>")
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(self.write_output("<p>", "same", "</p>"))
+        self.assertEqual(0, os.stat(self.path).st_mtime_ns)
+
+    def test_changed_output(self):
+        for old, new in [("<p>old</p>", "<p>new</p>"), ("<p>long</p>", "<p>"), ("<p>", "<p>longer</p>"), ("é", "è")]:
+            self.write_output(old)
+            self.assertTrue(self.write_output(*new.partition("p")))
+            self.assertEqual(new, self.read(self.path))
+        self.assertEqual(["index.html"], os.listdir(self.root))
+
+    def test_failed_render_keeps_old_file(self):
+        self.write_output("<p>old</p>")
+        with self.assertRaises(ValueError):
+            with OutputFile(self.path) as f:
+                f.write("<p>new")
+                raise ValueError("render failed")
+        self.assertEqual("<p>old</p>", self.read(self.path))
+        self.assertEqual(["index.html"], os.listdir(self.root))
+
+    def test_remove_untracked(self):
+        self.write_output("<p>tracked</p>")
+        self.write(os.path.join(self.root, "old", "index.html"), "stale")
+        manifest_path = os.path.join(self.root, "manifest.json")
+        save_manifest(manifest_path, {"pages": {self.path: {}}, "static": [manifest_path]})
+        self.assertEqual(1, self.quietly(remove_untracked, self.root, manifest_path))
+        self.assertEqual(["index.html", "manifest.json"], sorted(os.listdir(self.root)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import os
+import unittest
+from gencontent import generate_content_recursive
+from profiler import BuildProfiler, NullTimer, StageTimer
+from sitefixture import SiteTestCase
+
+class TestProfiler(SiteTestCase):
+    def test_stage_timer_records_spans(self):
+        timer = StageTimer()
+        with timer.stage("parse"):
+            pass
+        with self.assertRaises(ValueError):
+            with timer.stage("write"):
+                raise ValueError("boom")
+        self.assertEqual(["parse", "write"], [name for name, _, _ in timer.spans])
+
+    def test_null_timer(self):
+        with NullTimer().stage("parse"):
+            pass
+
+    def test_summary_orders_slowest_pages(self):
+        profiler = BuildProfiler()
+        profiler.add_page("fast.md", [("parse", 0.0, 0.001)])
+        profiler.add_page("slow.md", [("parse", 0.0, 0.004), ("serialize and write", 0.004, 0.002)])
+        summary = profiler.summary(top=1)
+        self.assertIn("Slowest 1 of 2 pages", summary)
+        self.assertIn("slow.md", summary)
+        self.assertNotIn("fast.md", summary)
+        self.assertEqual({"parse": (2, 0.005), "serialize and write": (1, 0.002)},
+                         {name: (calls, round(total, 6)) for name, (calls, total) in
+                          profiler.stage_totals(profiler.page_spans).items()})
+
+    def test_build_profile_and_trace(self):
+        content = os.path.join(self.root, "content")
+        for name in ("a", "b"):
+            self.write(os.path.join(content, f"{name}.md"), f"# {name}\n\nSome **text**")
+        template = os.path.join(self.root, "template.html")
+        self.write(template, "{{ Title }} {{ Content }}")
+        profiler = BuildProfiler()
+        with profiler.stage("content"):
+            self.quietly(generate_content_recursive, content, template, os.path.join(self.root, "out"), "/",
+                         profiler=profiler)
+        trace_path = os.path.join(self.root, "trace.json")
+        profiler.write_trace(trace_path)
+        events = json.loads(self.read(trace_path))["traceEvents"]
+        self.assertEqual(2, len(profiler.pages))
+        self.assertEqual(1 + 2 * 3, len(events))
+        self.assertEqual({"X"}, {event["ph"] for event in events})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import ast
+import os
+import time
+import unittest
+from unittest import mock
+import gencontent
+from rendercache import PARSER_MODULES, RenderCache, parser_version
+from sitefixture import SiteTestCase
+
+class TestRenderCache(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = os.path.join(self.root, "cache")
+
+    def test_round_trip(self):
+        cache = RenderCache(self.cache_dir)
+        self.assertIsNone(cache.get("# Title"))
+        cache.put("# Title", {"title": "Title", "html": "<div><h1>Title</h1></div>"})
+        self.assertEqual({"title": "Title", "html": "<div><h1>Title</h1></div>"}, cache.get("# Title"))
+        self.assertIsNone(cache.get("# Other"))
+
+    def test_version_change_invalidates(self):
+        RenderCache(self.cache_dir, version="old").put("# Title", {"title": "Title", "html": ""})
+        cache = RenderCache(self.cache_dir, version="new")
+        self.assertIsNone(cache.get("# Title"))
+        cache.put("# Title", {"title": "Title", "html": ""})
+        cache.remove_stale_versions()
+        self.assertEqual(["new"], os.listdir(self.cache_dir))
+
+    def test_parser_version_is_stable(self):
+        self.assertEqual(parser_version(), parser_version())
+
+    def test_parser_version_covers_parser_imports(self):
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+        pending = ["blockparser.py", "textparser.py"]
+        seen = set()
+        while pending:
+            name = pending.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            with open(os.path.join(src_dir, name), "r") as f:
+                tree = ast.parse(f.read())
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    modules = [alias.name for alias in node.names]
+                elif isinstance(node, ast.ImportFrom):
+                    modules = [node.module]
+                else:
+                    continue
+                for module in modules:
+                    if os.path.exists(os.path.join(src_dir, f"{module}.py")):
+                        pending.append(f"{module}.py")
+        self.assertEqual([], sorted(seen - set(PARSER_MODULES)))
+
+    def test_prune_evicts_least_recently_used(self):
+        cache = RenderCache(self.cache_dir, max_bytes=0)
+        for i, markdown in enumerate(["a", "b", "c"]):
+            cache.put(markdown, {"title": None, "html": "x" * 100})
+            os.utime(cache.path(cache.key(markdown)), (time.time() - 100 + i, time.time() - 100 + i))
+        cache.get("a")
+        cache.max_bytes = os.path.getsize(cache.path(cache.key("a"))) * 2
+        self.assertEqual(1, cache.prune())
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_cache_hit_skips_parser(self):
+        cache = RenderCache(self.cache_dir)
+        markdown = "# Cached **page**\n\n[home](/)"
+        rendered = gencontent.render_markdown(markdown, cache)
+        self.assertEqual(("Cached page", "<div><h1>Cached <b>page</b></h1><p><a href=\"/\">home</a></p></div>",
+                          {"images": [], "links": ["/"]}), rendered)
+        with mock.patch.object(gencontent, "parse_markdown_lazy", side_effect=AssertionError("parsed")):
+            self.assertEqual(rendered, gencontent.render_markdown(markdown, cache))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import argparse
+import os
+import unittest
+from gencontent import generate_content_incremental
+from manifest import load_manifest, save_manifest, update_manifest
+from shard import merge_shard_manifests, parse_shard, parse_shard_count, shard_manifest_path, shard_of
+from sitefixture import SiteTestCase
+
+class TestShard(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.public = os.path.join(self.root, "docs")
+        self.build_dir = os.path.join(self.root, ".build")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "{{ Title }}{{ Content }}")
+        for i in range(20):
+            self.write(os.path.join(self.content, f"page{i}", "index.md"), f"# Page {i}")
+
+    def build_shard(self, index, count):
+        manifest_path = shard_manifest_path(self.build_dir, index, count)
+        stats = self.quietly(generate_content_incremental, self.content, self.template, self.public, "/", manifest_path,
+                             shard=(index, count))
+        update_manifest(manifest_path, shard={"index": index, "count": count, **stats})
+        return stats
+
+    def test_parse_shard(self):
+        self.assertEqual((3, 8), parse_shard("3/8"))
+        for spec in ("0/8", "9/8", "3", "a/b"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_shard(spec)
+
+    def test_parse_shard_count(self):
+        self.assertEqual(3, parse_shard_count("3"))
+        for spec in ("0", "-2", "a"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_shard_count(spec)
+
+    def test_shard_of_is_stable(self):
+        self.assertEqual(shard_of("blog/tom/index.md", 8), shard_of("./blog/tom/index.md", 8))
+        self.assertTrue(1 <= shard_of("blog/tom/index.md", 8) <= 8)
+
+    def test_shards_partition_pages_and_merge(self):
+        generated = [self.build_shard(index, 3)["generated"] for index in (1, 2, 3)]
+        self.assertEqual(20, sum(generated))
+        self.assertEqual(20, len(os.listdir(self.public)))
+        manifest_path = os.path.join(self.build_dir, "manifest.json")
+        totals = merge_shard_manifests(self.build_dir, 3, manifest_path)
+        self.assertEqual({"shards": 3, "pages": 20, "static": 0, "generated": 20, "written": 20}, totals)
+        self.assertEqual(20, len(load_manifest(manifest_path)["pages"]))
+        self.assertEqual(20, len(load_manifest(manifest_path)["graph"]))
+
+    def test_merge_detects_overlap_and_missing_shards(self):
+        self.build_shard(1, 2)
+        with self.assertRaises(Exception):
+            merge_shard_manifests(self.build_dir, 2, os.path.join(self.build_dir, "manifest.json"))
+        first = load_manifest(shard_manifest_path(self.build_dir, 1, 2))
+        save_manifest(shard_manifest_path(self.build_dir, 2, 2), first)
+        with self.assertRaises(Exception) as cm:
+            merge_shard_manifests(self.build_dir, 2, os.path.join(self.build_dir, "manifest.json"))
+        self.assertIn("more than one shard", str(cm.exception))
+
+    def test_merge_needs_a_shard(self):
+        manifest_path = os.path.join(self.build_dir, "manifest.json")
+        self.build_shard(1, 1)
+        merge_shard_manifests(self.build_dir, 1, manifest_path)
+        for count in (0, -2):
+            with self.assertRaises(ValueError):
+                merge_shard_manifests(self.build_dir, count, manifest_path)
+        self.assertEqual(20, len(load_manifest(manifest_path)["pages"]))
+
+if __name__ == "__main__":
+    unittest.main()
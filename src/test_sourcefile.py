@@ -0,0 +1,47 @@
+import os
+import unittest
+from sitefixture import SiteTestCase
+from sourcefile import iter_source_lines, read_source
+
+class TestSourceFile(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.root, "page.md")
+
+    def lines(self, data, **kwargs):
+        with open(self.path, "wb") as f:
+            f.write(data)
+        return list(iter_source_lines(self.path, **kwargs))
+
+    def test_mapped_lines_match_text_mode(self):
+        samples = [
+            b"# Title\n\nsome text\n",
+            b"# Title\r\n\r\n\r\n- caf\xc3\xa9\r\n- na\xc3\xafve",
+            b"old\rmac\rnewlines\r",
+            b"",
+            b"\n\n\nleading blank lines\n\n",
+            "# Ünïcödé ".encode("utf-8") * 50 + b"\n\n" + b"x" * 300,
+        ]
+        for data in samples:
+            for chunk_size in (1, 7, 64, 4096):
+                self.assertEqual(self.lines(data), self.lines(data, mmap_threshold=0, chunk_size=chunk_size))
+
+    def test_mapped_read_matches_text_mode(self):
+        samples = [
+            b"# Title\r\n\r\n- caf\xc3\xa9\r\n- na\xc3\xafve",
+            b"old\rmac\rnewlines\r",
+            b"",
+            b"plain\n\ntext\n",
+        ]
+        for data in samples:
+            with open(self.path, "wb") as f:
+                f.write(data)
+            with open(self.path, "r") as f:
+                expected = f.read()
+            self.assertEqual(expected, read_source(self.path, mmap_threshold=0))
+
+    def test_small_file_is_read_as_text(self):
+        self.assertEqual(["a", "", "b"], self.lines(b"a\n\nb\n"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import io
+import unittest
+from htmlnode import LeafNode, ParentNode
+from template import Template, rewrite_root_urls
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual("<title>Hi</title><body><p>text</p></body>", template.render("Hi", "<p>text</p>"))
+        self.assertEqual(["Title", "Content"], template.slots)
+
+    def test_repeated_placeholders(self):
+        template = Template("{{ Title }}|{{ Content }}|{{ Title }}")
+        self.assertEqual("a|b|a", template.render("a", "b"))
+
+    def test_no_placeholders(self):
+        template = Template("<html></html>")
+        self.assertEqual("<html></html>", template.render("a", "b"))
+
+    def test_basepath_rewrites_template_and_content(self):
+        template = Template('<link href="/index.css" />{{ Content }}', "/site/")
+        self.assertEqual('<link href="/site/index.css" />', template.segments[0])
+        html = template.render("Title", '<a href="/blog">x</a><img src="/a.png" alt="" />')
+        expected = '<link href="/site/index.css" /><a href="/site/blog">x</a><img src="/site/a.png" alt="" />'
+        self.assertEqual(expected, html)
+
+    def test_default_basepath_is_untouched(self):
+        html = '<a href="/blog">x</a>'
+        self.assertIs(html, rewrite_root_urls(html, "/"))
+
+    def test_matches_replace_chain(self):
+        text = '<title>{{ Title }}</title><link href="/index.css" /><article>{{ Content }}</article>'
+        title = "A title"
+        content = '<p><a href="/x">x</a> and <img src="/y.png" alt="y"></img> and href="/z"</p>'
+        expected = text.replace("{{ Title }}", title).replace("{{ Content }}", content)
+        expected = expected.replace('href="/', 'href="/base/').replace('src="/', 'src="/base/')
+        self.assertEqual(expected, Template(text, "/base/").render(title, content))
+
+    def test_write_streams_same_output_as_render(self):
+        node = ParentNode(tag="div", children=[LeafNode(tag="a", value="home", props={"href": "/"})])
+        for basepath in ("/", "/site/"):
+            template = Template('<title>{{ Title }}</title><link href="/a.css" />{{ Content }}', basepath)
+            out = io.StringIO()
+            template.write(out.write, "Title", node)
+            self.assertEqual(template.render("Title", node.to_html()), out.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from textnode import TextNode, TextType, text_node_to_html_node
+from textnode import TextNode, TextType, text_node_to_html, text_node_to_html_node
 
 class TestTextNode(unittest.TestCase):
     # Text node tests
@@ -33,6 +33,10 @@ class TestTextNode(unittest.TestCase):
         node = TextNode("This is a text node", TextType.PLAIN, "https://www.boot.dev")
         self.assertEqual("TextNode(This is a text node, plain, https://www.boot.dev)", repr(node))
 
+    def test_no_instance_dict(self):
+        node = TextNode("This is a text node", TextType.PLAIN)
+        self.assertFalse(hasattr(node, "__dict__"))
+
     # Text node to HTML node tests
 
     def test_text(self):
@@ -78,5 +82,17 @@ class TestTextNode(unittest.TestCase):
         with self.assertRaises(Exception):
             text_node_to_html_node(node)
 
+    def test_direct_html_matches_leaf(self):
+        nodes = [
+            TextNode("plain", TextType.PLAIN),
+            TextNode("bold", TextType.BOLD),
+            TextNode("italic", TextType.ITALIC),
+            TextNode("code", TextType.CODE),
+            TextNode("link", TextType.LINK, "https://example.com"),
+            TextNode("alt", TextType.IMAGE, "/images/a.png"),
+        ]
+        for node in nodes:
+            self.assertEqual(text_node_to_html_node(node).to_html(), text_node_to_html(node))
+
 if __name__ == "__main__":
     unittest.main()
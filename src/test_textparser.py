@@ -1,7 +1,8 @@
 from re import split
+import random
 import unittest
 from textnode import TextNode, TextType
-from textparser import extract_markdown_images, extract_markdown_links, split_nodes_delimiter, split_nodes_images, split_nodes_links, text_to_textnodes
+from textparser import extract_markdown_images, extract_markdown_links, split_nodes_delimiter, split_nodes_images, split_nodes_links, text_to_textnodes, texts_to_textnodes
 
 
 class TestTextParser(unittest.TestCase):
@@ -222,6 +223,22 @@ class TestTextParser(unittest.TestCase):
         ]
         self.assertListEqual(expected, new_nodes)
 
+    def test_split_many_links(self):
+        text = " ".join(f"[link {i}](https://example.com/{i})" for i in range(500))
+        new_nodes = split_nodes_links([TextNode(text, TextType.PLAIN)])
+        self.assertEqual(999, len(new_nodes))
+        self.assertEqual(TextNode("link 499", TextType.LINK, "https://example.com/499"), new_nodes[-1])
+
+    def test_split_repeated_image(self):
+        node = TextNode("![a](b) and ![a](b)", TextType.PLAIN)
+        new_nodes = split_nodes_images([node])
+        expected = [
+            TextNode("a", TextType.IMAGE, "b"),
+            TextNode(" and ", TextType.PLAIN),
+            TextNode("a", TextType.IMAGE, "b"),
+        ]
+        self.assertListEqual(expected, new_nodes)
+
     # Text to text nodes tests
 
     def test_full_string(self):
@@ -240,3 +257,89 @@ class TestTextParser(unittest.TestCase):
             TextNode("link", TextType.LINK, "https://boot.dev"),
         ]
         self.assertListEqual(expected, new_nodes)
+
+    # Single-scan tokenizer tests
+
+    def five_pass_textnodes(self, text):
+        nodes = [TextNode(text, TextType.PLAIN)]
+        nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+        nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+        nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+        nodes = split_nodes_images(nodes)
+        nodes = split_nodes_links(nodes)
+        return nodes
+
+    def test_matches_five_pass_pipeline(self):
+        pieces = ["a", " ", "*", "**", "_", "`", "[", "]", "(", ")", "!", "[a](b)", "![i](u)", "**x**", "_y_", "`c`"]
+        rng = random.Random(1)
+        compared = 0
+        for _ in range(5000):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 20)))
+            try:
+                expected = self.five_pass_textnodes(text)
+            except ValueError:
+                continue
+            self.assertListEqual(expected, text_to_textnodes(text), text)
+            compared += 1
+        self.assertGreater(compared, 1000)
+
+    def test_earlier_pass_takes_precedence(self):
+        new_nodes = text_to_textnodes("[link](https://a.com/some_path_here)")
+        expected = [
+            TextNode("[link](https://a.com/some", TextType.PLAIN),
+            TextNode("path", TextType.ITALIC),
+            TextNode("here)", TextType.PLAIN),
+        ]
+        self.assertListEqual(expected, new_nodes)
+
+    def test_code_containing_earlier_delimiter(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("`a **b** c`")
+
+    def test_unclosed_delimiter(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **unclosed")
+
+    def test_empty_text(self):
+        self.assertListEqual([], text_to_textnodes(""))
+
+    def test_repeated_link(self):
+        new_nodes = text_to_textnodes("[a](b) and [a](b)")
+        expected = [
+            TextNode("a", TextType.LINK, "b"),
+            TextNode(" and ", TextType.PLAIN),
+            TextNode("a", TextType.LINK, "b"),
+        ]
+        self.assertListEqual(expected, new_nodes)
+
+    def test_link_after_unclosed_brackets(self):
+        new_nodes = text_to_textnodes("[a\n[b [c](d) ![e")
+        expected = [
+            TextNode("[a\n", TextType.PLAIN),
+            TextNode("b [c", TextType.LINK, "d"),
+            TextNode(" ![e", TextType.PLAIN),
+        ]
+        self.assertListEqual(expected, new_nodes)
+
+    def test_link_does_not_cross_newline(self):
+        new_nodes = text_to_textnodes("[a\n](b) [c](d\n)")
+        self.assertListEqual([TextNode("[a\n](b) [c](d\n)", TextType.PLAIN)], new_nodes)
+
+    def test_many_unclosed_urls(self):
+        text = "[a](b " * 2000
+        self.assertListEqual([TextNode(text, TextType.PLAIN)], text_to_textnodes(text))
+        self.assertListEqual([], extract_markdown_links(text))
+
+    def test_batch_matches_single_texts(self):
+        texts = ["plain item", "", "with **bold** text", "wow!", "[a](b) and ![i](u)", "snake_case_name"]
+        self.assertListEqual([text_to_textnodes(text) for text in texts], texts_to_textnodes(texts))
+
+    def test_batch_plain_texts(self):
+        self.assertListEqual(
+            [[TextNode("one", TextType.PLAIN)], [], [TextNode("three!", TextType.PLAIN)]],
+            texts_to_textnodes(["one", "", "three!"]),
+        )
+
+    def test_batch_unclosed_delimiter(self):
+        with self.assertRaises(ValueError):
+            texts_to_textnodes(["fine", "this is **unclosed"])
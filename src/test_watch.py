@@ -0,0 +1,126 @@
+import io
+import os
+import unittest
+from contextlib import redirect_stdout
+from gencontent import generate_content_incremental
+from manifest import load_manifest
+from sitefixture import SiteTestCase
+from watch import BuildServer
+from watcher import InotifyWatcher, PollingWatcher
+
+class TestBuildServer(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.manifest = os.path.join(self.root, ".build", "manifest.json")
+        self.server = BuildServer(self.content, self.static, self.template, self.public)
+        self.quietly(self.server.build_all, self.manifest)
+
+    def test_edited_page_only(self):
+        src = os.path.normpath(os.path.join(self.content, "index.md"))
+        self.write(src, "# New home")
+        rebuilt = self.quietly(self.server.handle_changes, {src})
+        self.assertEqual([os.path.join(self.public, "index.html")], [str(path) for path in rebuilt])
+        self.assertEqual("<title>New home</title><div><h1>New home</h1></div>", self.read(os.path.join(self.public, "index.html")))
+
+    def test_new_and_deleted_pages(self):
+        src = os.path.normpath(os.path.join(self.content, "new", "index.md"))
+        self.write(src, "# New")
+        self.quietly(self.server.handle_changes, {os.path.dirname(src)})
+        self.assertTrue(os.path.exists(os.path.join(self.public, "new", "index.html")))
+        os.remove(src)
+        self.quietly(self.server.handle_changes, {src})
+        self.assertFalse(os.path.exists(os.path.join(self.public, "new")))
+
+    def test_template_change_rerenders_all(self):
+        self.write(self.template, "{{ Title }}!")
+        rebuilt = self.quietly(self.server.handle_changes, {os.path.normpath(self.template)})
+        self.assertEqual(2, len(rebuilt))
+        self.assertEqual("Blog!", self.read(os.path.join(self.public, "blog", "index.html")))
+
+    def test_static_change(self):
+        src = os.path.normpath(os.path.join(self.static, "index.css"))
+        self.write(src, "body { margin: 0 }")
+        rebuilt = self.quietly(self.server.handle_changes, {src})
+        self.assertEqual(1, len(rebuilt))
+        self.assertEqual("body { margin: 0 }", self.read(os.path.join(self.public, "index.css")))
+
+    def test_changes_saved_to_manifest(self):
+        src = os.path.normpath(os.path.join(self.content, "new", "index.md"))
+        self.write(src, "# New")
+        self.quietly(self.server.handle_changes, {os.path.dirname(src)})
+        manifest = load_manifest(self.manifest)
+        self.assertEqual(src, manifest["pages"][os.path.join(self.public, "new", "index.html")]["source"])
+        self.assertIn(os.path.join(self.public, "new", "index.html"), manifest["graph"])
+        os.remove(src)
+        self.quietly(self.server.handle_changes, {src})
+        manifest = load_manifest(self.manifest)
+        self.assertNotIn(os.path.join(self.public, "new", "index.html"), manifest["pages"])
+        self.assertNotIn(os.path.join(self.public, "new", "index.html"), manifest["graph"])
+
+    def test_cli_build_after_watch_is_a_no_op(self):
+        src = os.path.normpath(os.path.join(self.content, "index.md"))
+        self.write(src, "# New home")
+        self.quietly(self.server.handle_changes, {src})
+        # main.py passes directories with "./" and a trailing slash
+        counts = self.quietly(generate_content_incremental, self.content + "/", os.path.join(self.root, ".", "template.html"),
+                              self.public + "/", "/", self.manifest)
+        self.assertEqual(0, counts["generated"])
+        self.assertEqual(0, counts["removed"])
+
+    def test_deleted_static_file_reports_references(self):
+        src = os.path.normpath(os.path.join(self.content, "index.md"))
+        self.write(src, "# Home\n\n![logo](/images/logo.png)")
+        self.write(os.path.join(self.static, "images", "logo.png"), "png")
+        self.quietly(self.server.handle_changes, {src, os.path.normpath(os.path.join(self.static, "images"))})
+        logo = os.path.normpath(os.path.join(self.static, "images", "logo.png"))
+        os.remove(logo)
+        log = io.StringIO()
+        with redirect_stdout(log):
+            self.assertEqual([], self.server.handle_changes({logo}))
+        self.assertIn(f"{os.path.join(self.public, 'index.html')} still references /images/logo.png", log.getvalue())
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images", "logo.png")))
+
+    def test_broken_page_keeps_server_running(self):
+        src = os.path.normpath(os.path.join(self.content, "index.md"))
+        self.write(src, "no heading")
+        self.assertEqual([], self.quietly(self.server.handle_changes, {src}))
+
+
+class TestWatchers(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dir = os.path.join(self.root, "content")
+        os.makedirs(self.dir)
+        self.file = os.path.join(self.root, "template.html")
+        self.write(self.file, "")
+
+    def check_watcher(self, watcher):
+        try:
+            page = os.path.join(self.dir, "page.md")
+            self.write(page, "# Page")
+            self.assertIn(os.path.normpath(page), watcher.wait(2))
+            self.write(self.file, "changed")
+            self.assertIn(os.path.normpath(self.file), watcher.wait(2))
+        finally:
+            watcher.close()
+
+    def test_polling_watcher(self):
+        self.check_watcher(PollingWatcher([self.dir], [self.file], interval=0.01))
+
+    def test_inotify_watcher(self):
+        try:
+            watcher = InotifyWatcher([self.dir], [self.file])
+        except (OSError, AttributeError):
+            self.skipTest("inotify is not available")
+        self.check_watcher(watcher)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,5 @@
 from enum import Enum
-from htmlnode import LeafNode
+from htmlnode import LeafNode, leaf_html
 
 
 class TextType(Enum):
@@ -12,6 +12,8 @@ class TextType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -26,19 +28,29 @@ class TextNode:
     def __repr__(self):
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
-def text_node_to_html_node(text_node):
+def text_node_leaf(text_node):
+    # The (tag, value, props) of the leaf a text node renders as
     match text_node.text_type:
         case TextType.PLAIN:
-            return LeafNode(tag=None, value=text_node.text)
+            return None, text_node.text, None
         case TextType.BOLD:
-            return LeafNode(tag="b", value=text_node.text)
+            return "b", text_node.text, None
         case TextType.ITALIC:
-            return LeafNode(tag="i", value=text_node.text)
+            return "i", text_node.text, None
         case TextType.CODE:
-            return LeafNode(tag="code", value=text_node.text)
+            return "code", text_node.text, None
         case TextType.LINK:
-            return LeafNode(tag="a", value=text_node.text, props={ "href": text_node.url })
+            return "a", text_node.text, { "href": text_node.url }
         case TextType.IMAGE:
-            return LeafNode(tag="img", value="", props={ "src": text_node.url, "alt": text_node.text })
+            return "img", "", { "src": text_node.url, "alt": text_node.text }
         case _:
-            raise Exception(f"{text_node.text_type.value}: Not a valid text type") 
+            raise Exception(f"{text_node.text_type.value}: Not a valid text type")
+
+def text_node_to_html_node(text_node):
+    tag, value, props = text_node_leaf(text_node)
+    return LeafNode(tag=tag, value=value, props=props)
+
+def text_node_to_html(text_node):
+    # The html text_node_to_html_node(text_node).to_html() gives, without
+    # building the leaf
+    return leaf_html(*text_node_leaf(text_node))
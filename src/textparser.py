@@ -1,6 +1,61 @@
-import re
+from syntax import (
+    IMAGE_OPEN, IMAGE_SPAN_PATTERN, INLINE_DELIMITERS, INLINE_MARKUP_PATTERN, INLINE_TOKEN_PATTERN, LINK_CLOSE, LINK_MIDDLE, LINK_OPEN,
+    LINK_SPAN_PATTERN,
+)
 from textnode import TextNode, TextType
 
+DELIMITER_TYPES = {delimiter: TextType(name) for delimiter, name in INLINE_DELIMITERS}
+# The delimiters a span of each kind may not contain
+EARLIER_DELIMITERS = {delimiter: list(DELIMITER_TYPES)[:index] for index, delimiter in enumerate(DELIMITER_TYPES)}
+
+
+class SpanScanner:
+    # Matches "[alt](url)" spans like the lazy pattern \[(.*?)\]\((.*?)\)
+    # but with str.find, remembering where the next "](", ")" and newline
+    # are. A line full of unclosed brackets is then scanned once instead of
+    # once per bracket. Queries should move forward through the text
+    def __init__(self, text):
+        self.text = text
+        self.length = len(text)
+        # (searched from, found at) for the next "](", ")" and newline
+        self.middle = self.close = self.newline = (0, -1)
+
+    def find(self, needle, start):
+        position = self.text.find(needle, start)
+        return (start, self.length if position == -1 else position)
+
+    def match(self, alt_start, bound):
+        # Returns (alt, url, end) for a span whose text starts at alt_start
+        # and which ends by bound, or None
+        searched, middle = self.middle
+        if not searched <= alt_start <= middle:
+            self.middle = searched, middle = self.find(LINK_MIDDLE, alt_start)
+        if middle >= bound:
+            return None
+        searched, newline = self.newline
+        if not searched <= alt_start <= newline:
+            self.newline = searched, newline = self.find("\n", alt_start)
+        if newline < middle:
+            return None
+        url_start = middle + 2
+        searched, close = self.close
+        if not searched <= url_start <= close:
+            self.close = searched, close = self.find(LINK_CLOSE, url_start)
+        # The first newline at or after alt_start is not before middle, so
+        # it is only inside the url if it comes before close
+        if close >= bound or newline < close:
+            return None
+        return self.text[alt_start:middle], self.text[url_start:close], close + 1
+
+    def search_image(self, start, bound):
+        # Start of the first image that begins at or after start and ends by bound
+        position = self.text.find(IMAGE_OPEN, start, bound)
+        while position != -1:
+            if self.match(position + 2, bound) is not None:
+                return position
+            position = self.text.find(IMAGE_OPEN, position + 1, bound)
+        return None
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
     for node in old_nodes:
@@ -22,86 +77,168 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 
     return new_nodes
 
-def extract_markdown_images(text):
-    list_of_matches = []
-    # pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)" # boot.dev regex (read after completing myself)
-    pattern = r"\!\[.*?\]\(.*?\)"
-    matches = re.findall(pattern, text)
-    for string in matches:
-        string = string[2:len(string)-1]
-        string = string.split("](")
-        list_of_matches.append((string[0], string[1]))
-    return list_of_matches
+def find_markdown_images(text):
+    matches = []
+    scanner = SpanScanner(text)
+    position = text.find(IMAGE_OPEN)
+    while position != -1:
+        match = scanner.match(position + 2, len(text))
+        if match is None:
+            position = text.find(IMAGE_OPEN, position + 1)
+            continue
+        alt, url, end = match
+        matches.append((position, end, alt, url))
+        position = text.find(IMAGE_OPEN, end)
+    return matches
+
+def find_markdown_links(text):
+    # Same matches as finditer over ([\s\S]?)\[(.*?)\]\((.*?)\), which lets
+    # a "!" prefix mark image syntax to skip. A "[" prefix only re-adds the
+    # bracket that the plain match already puts at the front of the text
+    matches = []
+    scanner = SpanScanner(text)
+    position = text.find(LINK_OPEN)
+    while position != -1:
+        match = scanner.match(position + 1, len(text))
+        if match is None:
+            position = text.find(LINK_OPEN, position + 1)
+            continue
+        alt, url, end = match
+        if text[position - 1:position] != "!":
+            matches.append((position, end, alt, url))
+        position = text.find(LINK_OPEN, end)
+    return matches
 
+def extract_markdown_images(text):
+    return [(alt, url.split("](")[0]) for _, _, alt, url in find_markdown_images(text)]
 
 def extract_markdown_links(text):
-    list_of_matches = []
-    # pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)" # boot.dev regex (read after completing myself)
-    pattern = r"[\s\S]?\[.*?\]\(.*?\)"
-    matches = re.findall(pattern, text)
-    for string in matches:
-        if string[0] == "!":
-            continue
-        if string[0] == "[":
-            string = string[1:len(string)-1]
-        else:
-            string = string[2:len(string)-1]
-        string = string.split("](")
-        list_of_matches.append((string[0], string[1]))
-    return list_of_matches
+    return [(alt, url.split("](")[0]) for _, _, alt, url in find_markdown_links(text)]
 
 def split_nodes_images(old_nodes):
-    new_nodes = []
-    for node in old_nodes:
-        if node.text_type != TextType.PLAIN:
-            new_nodes.append(node)
-            continue
-        string = node.text
-        images = extract_markdown_images(string)
-        if len(images) == 0:
-            new_nodes.append(node)
-            continue
-        for image in images:
-            split = string.split(f"![{image[0]}]({image[1]})")
-            if len(split) != 2:
-                raise ValueError("invalid markdown, image section not closed")
-            if split[0] != "":
-                new_nodes.append(TextNode(split[0], TextType.PLAIN))
-            new_nodes.append(TextNode(image[0], TextType.IMAGE, image[1]))
-            string = split[1] 
-        if string != "":
-            new_nodes.append(TextNode(string, TextType.PLAIN))
-    return new_nodes
+    return split_nodes_matches(old_nodes, find_markdown_images, TextType.IMAGE)
 
 def split_nodes_links(old_nodes):
+    return split_nodes_matches(old_nodes, find_markdown_links, TextType.LINK)
+
+def split_nodes_matches(old_nodes, find_matches, text_type):
     new_nodes = []
     for node in old_nodes:
         if node.text_type != TextType.PLAIN:
             new_nodes.append(node)
             continue
         string = node.text
-        links = extract_markdown_links(string)
-        if len(links) == 0:
+        matches = find_matches(string)
+        if len(matches) == 0:
             new_nodes.append(node)
             continue
-        for link in links:
-            split = string.split(f"[{link[0]}]({link[1]})")
-            if len(split) != 2:
-                raise ValueError("invalid markdown, link section not closed")
-            if split[0] != "":
-                new_nodes.append(TextNode(split[0], TextType.PLAIN))
-            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
-            string = split[1]
-        if string != "":
-            new_nodes.append(TextNode(string, TextType.PLAIN))
+        position = 0
+        for start, end, alt, url in matches:
+            if "](" in url:
+                raise ValueError(f"invalid markdown, {text_type.value} section not closed")
+            if start > position:
+                new_nodes.append(TextNode(string[position:start], TextType.PLAIN))
+            new_nodes.append(TextNode(alt, text_type, url))
+            position = end
+        if position < len(string):
+            new_nodes.append(TextNode(string[position:], TextType.PLAIN))
     return new_nodes
 
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.PLAIN)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_images(nodes)
-    nodes = split_nodes_links(nodes)
+    # One left-to-right scan that gives the same nodes as running
+    # split_nodes_delimiter for **, _ and `, then split_nodes_images and
+    # split_nodes_links. Earlier passes take precedence, so a span may not
+    # contain a delimiter of a pass that ran before it.
+    nodes = []
+    length = len(text)
+    next_positions = {}
+
+    def next_delimiter(delimiter, start):
+        position = next_positions.get(delimiter, -1)
+        if position < start:
+            position = text.find(delimiter, start)
+            if position == -1:
+                position = length
+            next_positions[delimiter] = position
+        return position
+
+    scanner = None
+    image_scanner = None
+    next_image = None
+    plain_start = 0
+    scan = 0
+    while True:
+        token = INLINE_TOKEN_PATTERN.search(text, scan)
+        if token is None:
+            break
+        start = token.start()
+        delimiter = token.group()
+
+        text_type = DELIMITER_TYPES.get(delimiter)
+        if text_type is not None:
+            bound = min([next_delimiter(earlier, start) for earlier in EARLIER_DELIMITERS[delimiter]], default=length)
+            end = text.find(delimiter, start + len(delimiter), bound)
+            if end == -1:
+                raise ValueError("Invalid markdown, section not closed")
+            if start > plain_start:
+                nodes.append(TextNode(text[plain_start:start], TextType.PLAIN))
+            if end > start + len(delimiter):
+                nodes.append(TextNode(text[start + len(delimiter):end], text_type))
+            plain_start = scan = end + len(delimiter)
+            continue
+
+        bound = min([next_delimiter(span_delimiter, start) for span_delimiter in DELIMITER_TYPES])
+        if delimiter == IMAGE_OPEN:
+            pattern = IMAGE_SPAN_PATTERN
+            text_type = TextType.IMAGE
+        else:
+            if next_image is None or next_image[0] != bound or (next_image[1] is not None and next_image[1] < start):
+                # The look-ahead runs ahead of the main scan, so it gets
+                # its own scanner to keep both moving forward
+                if image_scanner is None:
+                    image_scanner = SpanScanner(text)
+                next_image = (bound, image_scanner.search_image(start, bound))
+            if next_image[1] is not None:
+                bound = next_image[1]
+            pattern = LINK_SPAN_PATTERN
+            text_type = TextType.LINK
+        if scanner is None:
+            # The anchored regex is quickest while spans keep matching, but
+            # each miss rescans the line, so the first miss hands the rest
+            # of the text to a scanner
+            match = pattern.match(text, start, bound)
+            if match is None:
+                scanner = SpanScanner(text)
+                scan = start + 1
+                continue
+            alt, url = match.groups()
+            end = match.end()
+        else:
+            match = scanner.match(start + len(delimiter), bound)
+            if match is None:
+                scan = start + 1
+                continue
+            alt, url, end = match
+        if LINK_MIDDLE in url:
+            raise ValueError(f"invalid markdown, {text_type.value} section not closed")
+        if start > plain_start:
+            nodes.append(TextNode(text[plain_start:start], TextType.PLAIN))
+        nodes.append(TextNode(alt, text_type, url))
+        plain_start = scan = end
+
+    if plain_start < length:
+        nodes.append(TextNode(text[plain_start:], TextType.PLAIN))
     return nodes
 
+def texts_to_textnodes(texts):
+    # Parses many short texts in one call, e.g. the items of a list. Texts
+    # with no markup character skip the scan and become one plain node
+    nodes = []
+    for text in texts:
+        if INLINE_MARKUP_PATTERN.search(text) is not None:
+            nodes.append(text_to_textnodes(text))
+        elif text:
+            nodes.append([TextNode(text, TextType.PLAIN)])
+        else:
+            nodes.append([])
+    return nodes
@@ -0,0 +1,186 @@
+import argparse
+import os
+import time
+from pathlib import Path
+from copystatic import is_unchanged, sync_files_recursive, transfer_file, walk_files
+from depgraph import DependencyGraph, load_graph
+from gencontent import find_pages, generate_content_incremental, generate_page, render_markdown
+from manifest import hash_file, load_manifest, page_entry, remove_output, update_manifest
+from rendercache import MemoryRenderCache
+from template import load_template
+from watcher import create_watcher
+
+public_dir = "./docs/"
+static_dir = "./static/"
+content_dir = "./content/"
+template_path = "./template.html"
+manifest_path = os.path.join("./.build/", "manifest.json")
+
+
+class BuildServer:
+    def __init__(self, content_dir, static_dir, template_path, public_dir, basepath="/"):
+        self.content_dir = os.path.normpath(content_dir)
+        self.static_dir = os.path.normpath(static_dir)
+        self.template_path = os.path.normpath(template_path)
+        self.public_dir = os.path.normpath(public_dir)
+        self.basepath = basepath
+        self.template = load_template(self.template_path, basepath)
+        self.template_hash = hash_file(self.template_path)
+        self.cache = MemoryRenderCache()
+        self.graph = DependencyGraph()
+        self.pages = {}
+        self.static_files = {}
+        self.manifest_path = None
+
+    def build_all(self, manifest_path):
+        self.manifest_path = manifest_path
+        sync_files_recursive(self.static_dir, self.public_dir, manifest_path)
+        generate_content_incremental(self.content_dir, self.template_path, self.public_dir,
+                                     self.basepath, manifest_path, cache=self.cache)
+        for entry, dst_path in walk_files(self.static_dir, self.public_dir):
+            self.static_files[os.path.normpath(entry.path)] = dst_path
+        self.graph = load_graph(manifest_path)
+        self.pages = load_manifest(manifest_path)["pages"]
+        self.template_hash = hash_file(self.template_path)
+        # Parse the pages the incremental build skipped, so a template
+        # change only has to re-fill the template
+        for src_path in self.graph.sources():
+            self.warm(src_path)
+
+    def handle_changes(self, paths):
+        rebuilt = []
+        if self.template_path in paths:
+            print(f" * {self.template_path} changed, re-rendering every page")
+            self.template = load_template(self.template_path, self.basepath)
+            self.template_hash = hash_file(self.template_path)
+            for dst_path in self.graph.outputs_for_template(self.template_path):
+                if self.render(self.graph.source_of(dst_path), dst_path):
+                    rebuilt.append(dst_path)
+        for path in sorted(paths):
+            if self.is_under(path, self.content_dir):
+                rebuilt.extend(self.content_changed(path))
+            elif self.is_under(path, self.static_dir):
+                rebuilt.extend(self.static_changed(path))
+        self.save_manifest()
+        return rebuilt
+
+    def save_manifest(self):
+        # Keeps the manifest in step with the outputs, so a later
+        # incremental build from main.py only redoes what changed since
+        if self.manifest_path is None:
+            return
+        static = sorted(os.path.normpath(dst_path) for dst_path in self.static_files.values())
+        update_manifest(self.manifest_path, pages=self.pages, static=static, graph=self.graph.to_dict())
+
+    def content_changed(self, path):
+        rebuilt = []
+        if os.path.isdir(path):
+            for src_path, dst_path in find_pages(path, self.destination(path, self.content_dir)):
+                if self.render(src_path, dst_path):
+                    rebuilt.append(dst_path)
+        elif os.path.isfile(path):
+            dst_path = Path(self.destination(path, self.content_dir)).with_suffix(".html")
+            if self.render(path, dst_path):
+                rebuilt.append(dst_path)
+        else:
+            # A deleted page is found directly; only a deleted directory
+            # needs the prefix scan over every known source
+            sources = [path] if self.graph.outputs_for_source(path) else self.known_under(self.graph.sources(), path)
+            for src_path in sources:
+                for dst_path in self.graph.outputs_for_source(src_path):
+                    remove_output(dst_path, self.public_dir)
+                    self.graph.remove(dst_path)
+                    self.pages.pop(dst_path, None)
+        return rebuilt
+
+    def static_changed(self, path):
+        rebuilt = []
+        if os.path.isdir(path):
+            files = [(entry.path, dst_path) for entry, dst_path in walk_files(path, self.destination(path, self.static_dir))]
+        elif os.path.isfile(path):
+            files = [(path, self.destination(path, self.static_dir))]
+        else:
+            for src_path in self.known_under(self.static_files, path):
+                remove_output(self.static_files.pop(src_path), self.public_dir)
+                self.report_references(src_path)
+            return rebuilt
+        for src_path, dst_path in files:
+            self.static_files[os.path.normpath(src_path)] = dst_path
+            if is_unchanged(src_path, dst_path):
+                continue
+            print(f" * {src_path} -> {dst_path}")
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            transfer_file(src_path, dst_path)
+            rebuilt.append(dst_path)
+        return rebuilt
+
+    def report_references(self, src_path):
+        # Static files are copied as they are, so pages are never rebuilt
+        # for them, but a page still pointing at a deleted one is broken
+        url = "/" + Path(os.path.relpath(src_path, self.static_dir)).as_posix()
+        for dst_path in self.graph.pages_referencing(url):
+            print(f" * {dst_path} still references {url}")
+
+    def render(self, src_path, dst_path):
+        try:
+            _, references = generate_page(src_path, self.template_path, dst_path, self.basepath, self.template, self.cache)
+        except Exception as e:
+            print(f"Unable to generate {src_path}: {e}")
+            return False
+        self.graph.add_page(dst_path, src_path, self.template_path, references["images"], references["links"])
+        self.pages[os.path.normpath(dst_path)] = page_entry(src_path, self.template_hash, self.basepath)
+        return True
+
+    def warm(self, src_path):
+        with open(src_path, "r") as f:
+            markdown = f.read()
+        try:
+            render_markdown(markdown, self.cache)
+        except Exception:
+            # Reported when the page is rendered
+            pass
+
+    def destination(self, path, root):
+        return os.path.join(self.public_dir, os.path.relpath(path, root))
+
+    def is_under(self, path, root):
+        return path == root or path.startswith(root + os.sep)
+
+    def known_under(self, files, path):
+        return [src_path for src_path in sorted(files) if self.is_under(src_path, path)]
+
+    def __repr__(self):
+        return f"BuildServer({self.content_dir}, {self.static_dir}, {self.template_path}, {self.public_dir}, {self.basepath})"
+
+
+def watch(server, watcher):
+    print(f"Watching {server.content_dir}, {server.static_dir} and {server.template_path} for changes (Ctrl-C to stop)")
+    try:
+        while True:
+            changed = watcher.wait()
+            if not changed:
+                continue
+            start = time.perf_counter()
+            rebuilt = server.handle_changes(changed)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"Rebuilt {len(rebuilt)} files in {elapsed:.1f}ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+def main():
+    parser = argparse.ArgumentParser(prog="watch")
+    parser.add_argument("basepath", nargs="?", default="/", help="basepath defaults to /")
+    parser.add_argument("--poll", action="store_true", help="poll for changes instead of using inotify")
+    parser.add_argument("--interval", type=float, default=0.25, help="polling interval in seconds")
+    args = parser.parse_args()
+
+    server = BuildServer(content_dir, static_dir, template_path, public_dir, args.basepath)
+    print("Building site...")
+    server.build_all(manifest_path)
+    watcher = create_watcher([server.content_dir, server.static_dir], [server.template_path], args.poll, args.interval)
+    watch(server, watcher)
+
+if __name__ == "__main__":
+    main()
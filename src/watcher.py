@@ -0,0 +1,149 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+# inotify(7) event masks
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    def __init__(self, dirs, files, interval=0.25):
+        self.dirs = [os.path.normpath(path) for path in dirs]
+        self.files = [os.path.normpath(path) for path in files]
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for root in self.dirs:
+            for dirpath, _, filenames in os.walk(root):
+                for filename in filenames:
+                    self.stat_into(snapshot, os.path.join(dirpath, filename))
+        for path in self.files:
+            self.stat_into(snapshot, path)
+        return snapshot
+
+    def stat_into(self, snapshot, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval)
+            snapshot = self.scan()
+            changed = set()
+            for path in snapshot.keys() | self.snapshot.keys():
+                if snapshot.get(path) != self.snapshot.get(path):
+                    changed.add(path)
+            self.snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return f"PollingWatcher({self.dirs}, {self.files}, {self.interval})"
+
+
+class InotifyWatcher:
+    def __init__(self, dirs, files, settle=0.02):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.settle = settle
+        self.watches = {}
+        self.files = set(os.path.normpath(path) for path in files)
+        for path in dirs:
+            self.add_tree(os.path.normpath(path))
+        for path in self.files:
+            self.add_watch(os.path.dirname(path) or ".", recursive=False)
+
+    def add_watch(self, path, recursive):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        # A directory that is both a tree root and a file's parent stays recursive
+        _, was_recursive = self.watches.get(wd, (path, False))
+        self.watches[wd] = (path, recursive or was_recursive)
+
+    def add_tree(self, root):
+        for dirpath, _, _ in os.walk(root):
+            self.add_watch(dirpath, recursive=True)
+
+    def wait(self, timeout=None):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = self.read_events()
+        # Editors often write a file in several steps; collect the burst
+        while True:
+            ready, _, _ = select.select([self.fd], [], [], self.settle)
+            if not ready:
+                return changed
+            changed |= self.read_events()
+
+    def read_events(self):
+        changed = set()
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            if wd not in self.watches:
+                continue
+            dirpath, recursive = self.watches[wd]
+            path = os.path.normpath(os.path.join(dirpath, name)) if name else dirpath
+            if not recursive:
+                if path in self.files:
+                    changed.add(path)
+                continue
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self.add_tree(path)
+            elif mask & IN_CREATE:
+                # Wait for IN_CLOSE_WRITE so half-written files are skipped
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+    def __repr__(self):
+        return f"InotifyWatcher({sorted(path for path, _ in self.watches.values())})"
+
+
+def create_watcher(dirs, files, poll=False, interval=0.25):
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(dirs, files)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}), falling back to polling")
+    return PollingWatcher(dirs, files, interval)